@@ -1,22 +1,65 @@
+import gc
+
 from flask import Flask
 from flask_cors import CORS
 from flask_restful import Api
 
-from resources.players import Players
+from resources.leaderboards import Leaderboards
+from resources.metrics import Metrics
+from resources.players import Players, PlayerSeasons
 from resources.seasons import Seasons
 from resources.shotchart import Shotchart
+from resources.shotchart_data import ShotchartData
+from resources.shotchart_batch import ShotchartBatch
+from utils import metrics
+from utils.constants import RENDER_WORKERS
+from utils.render_pool import render_pool
+from utils.season_store import season_store
+
+
+def warm_up():
+    """
+    Imports matplotlib and nba_api and loads every season, which otherwise happens on the first request that needs
+    them. Called in the master process of a pre-forking server (gunicorn --preload) all of it is loaded once and
+    shared by the workers copy-on-write.
+    """
+    import nba_api.stats.static.players  # noqa: F401
+    import utils.headshots  # noqa: F401
+    from utils.shotchart_tools import get_shotchart_background
+
+    get_shotchart_background()
+    for season in season_store.seasons():
+        season_store.get(season).roster()
+        season_store.get(season).leaderboards()
+        season_store.league_average(season)
+    # Everything loaded so far lives until the end, moving it out of the reach of the garbage collector keeps the
+    # collections in the workers from writing to (and copying) the shared pages
+    gc.collect()
+    gc.freeze()
 
 
-def create_app():
+def create_app(preload=False):
     app = Flask(__name__)
     CORS(app)
+    metrics.init_app(app)
     api = Api(app)
     api.add_resource(Seasons, '/api/seasons')
     api.add_resource(Players, '/api/players')
+    api.add_resource(PlayerSeasons, '/api/players/<int:player_id>')
     api.add_resource(Shotchart, '/api/shotchart')
+    api.add_resource(ShotchartData, '/api/shotchart/data')
+    api.add_resource(ShotchartBatch, '/api/shotchart/batch')
+    api.add_resource(Leaderboards, '/api/leaderboards')
+    api.add_resource(Metrics, '/api/metrics')
+    if preload:
+        if RENDER_WORKERS is None:
+            # Every server worker would spawn its own render processes, which load the seasons again instead of
+            # sharing them with the master, server workers render on their request threads instead
+            render_pool.workers = 0
+        warm_up()
     return app
 
 
 if __name__ == '__main__':
     app = create_app()
-    app.run(port='4000', host='localhost')
\ No newline at end of file
+    app.run(port='4000', host='localhost')
@@ -0,0 +1,48 @@
+import pytest
+
+from conftest import SEASON, VOLUMES
+from utils.render_cache import render_cache
+
+
+def get(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, response.data
+    return response
+
+
+@pytest.mark.benchmark(group='api')
+def bench_seasons(benchmark, client):
+    benchmark(get, client, '/api/seasons')
+
+
+@pytest.mark.benchmark(group='api')
+def bench_players(benchmark, client):
+    benchmark(get, client, f'/api/players?season={SEASON}')
+
+
+@pytest.mark.benchmark(group='api')
+def bench_leaderboards(benchmark, client):
+    benchmark(get, client, f'/api/leaderboards?season={SEASON}&minAttempts=5')
+
+
+@pytest.mark.benchmark(group='api shotchart')
+@pytest.mark.parametrize('volume', VOLUMES)
+def bench_shotchart(benchmark, client, players, volume):
+    # Cache is cleared before every round, so every request renders the chart
+    benchmark.pedantic(get, args=(client, f'/api/shotchart?season={SEASON}&playerId={players[volume]}'),
+                       setup=render_cache.clear, rounds=10)
+
+
+@pytest.mark.benchmark(group='api shotchart')
+@pytest.mark.parametrize('volume', VOLUMES)
+def bench_shotchart_cached(benchmark, client, players, volume):
+    url = f'/api/shotchart?season={SEASON}&playerId={players[volume]}'
+    get(client, url)
+    benchmark(get, client, url)
+
+
+@pytest.mark.benchmark(group='api shotchart')
+@pytest.mark.parametrize('volume', VOLUMES)
+def bench_shotchart_data(benchmark, client, players, volume):
+    benchmark.pedantic(get, args=(client, f'/api/shotchart/data?season={SEASON}&playerId={players[volume]}'),
+                       setup=render_cache.clear, rounds=10)
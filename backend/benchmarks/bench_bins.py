@@ -0,0 +1,20 @@
+import pytest
+
+from conftest import SEASON, VOLUMES
+from utils.season_store import season_store
+from utils.shotchart_tools import create_bins
+
+
+@pytest.mark.benchmark(group='create_bins')
+@pytest.mark.parametrize('volume', VOLUMES)
+def bench_create_bins(benchmark, players, volume):
+    shots = season_store.player_shots(SEASON, players[volume])
+    league_average = season_store.league_average(SEASON)
+    benchmark(create_bins, data_frame=shots, league_average=league_average)
+
+
+@pytest.mark.benchmark(group='create_bins')
+def bench_create_bins_whole_season(benchmark):
+    shots = season_store.get(SEASON).shots
+    league_average = season_store.league_average(SEASON)
+    benchmark(create_bins, data_frame=shots, league_average=league_average, group_by='PLAYER_ID')
@@ -0,0 +1,41 @@
+import io
+
+import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from conftest import SEASON, VOLUMES
+from utils.season_store import season_store
+from utils.shotchart_tools import create_bins, plot_shotchart, render_shotchart_png
+
+
+def binned(player_id):
+    shots = season_store.player_shots(SEASON, player_id)
+    return shots, create_bins(data_frame=shots, league_average=season_store.league_average(SEASON))
+
+
+@pytest.mark.benchmark(group='plot_shotchart')
+@pytest.mark.parametrize('volume', VOLUMES)
+def bench_plot_shotchart(benchmark, players, volume):
+    shots, binned_df = binned(players[volume])
+
+    def plot():
+        plot_shotchart(original_df=shots, data_frame=binned_df, title="Benchmark").clear()
+
+    benchmark(plot)
+
+
+@pytest.mark.benchmark(group='png')
+@pytest.mark.parametrize('volume', VOLUMES)
+def bench_print_png(benchmark, players, volume):
+    shots, binned_df = binned(players[volume])
+    figure = plot_shotchart(original_df=shots, data_frame=binned_df, title="Benchmark")
+    canvas = FigureCanvasAgg(figure)
+
+    benchmark(lambda: canvas.print_png(io.BytesIO()))
+
+
+@pytest.mark.benchmark(group='png')
+@pytest.mark.parametrize('volume', VOLUMES)
+def bench_render_on_background(benchmark, players, volume):
+    shots, binned_df = binned(players[volume])
+    benchmark(render_shotchart_png, original_df=shots, data_frame=binned_df, title="Benchmark")
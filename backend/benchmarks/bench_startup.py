@@ -0,0 +1,106 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from conftest import SEASON, report
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+# Runs in a fresh interpreter: starts the app, answers the first request and optionally forks workers which each
+# render a chart, the way a pre-forking server does. Render pool has its default size, memory of a worker includes
+# the render processes it started. Prints timings and memory as JSON.
+STARTUP_SCRIPT = """
+import json, os, sys, time
+start = time.perf_counter()
+backend, shots_path, league_avg_path, preload, workers, url = sys.argv[1:]
+sys.path.insert(0, backend)
+
+
+def memory(pid='self'):
+    # Resident memory of a process and the part of it which isn't shared with any other process, in MB
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as smaps:
+        for line in smaps:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {'rss': fields['Rss'], 'pss': fields['Pss'],
+            'private': fields['Private_Clean'] + fields['Private_Dirty']}
+
+
+from utils.artifact_store import artifact_store
+from utils.render_pool import render_pool
+from utils.season_store import season_store
+season_store.shots_path, season_store.league_avg_path = shots_path, league_avg_path
+artifact_store.path = None
+
+from app import create_app
+app = create_app(preload=preload == '1')
+assert app.test_client().get('/api/seasons').status_code == 200
+result = {'first_response': time.perf_counter() - start, 'master': memory(), 'workers': []}
+
+pipes = []
+for _ in range(int(workers)):
+    read_fd, write_fd = os.pipe()
+    if os.fork() == 0:
+        os.close(read_fd)
+        status = app.test_client().get(url).status_code
+        usage = memory()
+        renderers = list(render_pool._executor._processes) if render_pool._executor is not None else []
+        for pid in renderers:
+            for field, mb in memory(pid).items():
+                usage[field] += mb
+        os.write(write_fd, json.dumps(dict(usage, status=status, renderers=len(renderers))).encode())
+        render_pool.shutdown()
+        os._exit(0)
+    os.close(write_fd)
+    pipes.append(read_fd)
+for read_fd in pipes:
+    with os.fdopen(read_fd) as pipe:
+        result['workers'].append(json.loads(pipe.read()))
+    os.wait()
+print(json.dumps(result))
+"""
+
+pytestmark = pytest.mark.skipif(not Path('/proc/self/smaps_rollup').exists(),
+                                reason="Memory is read from /proc/self/smaps_rollup")
+
+
+def start(data_dir, preload, workers=0, url=''):
+    directory, _ = data_dir
+    output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, str(BACKEND), str(directory / 'shots'),
+                             str(directory / 'league_avg'), '1' if preload else '0', str(workers), url],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+@pytest.mark.benchmark(group='startup')
+@pytest.mark.parametrize('preload', [False, True], ids=['lazy', 'preload'])
+def bench_cold_start(benchmark, data_dir, preload):
+    # Time from starting the interpreter to answering /api/seasons
+    result = benchmark.pedantic(start, args=(data_dir, preload), rounds=5)
+    benchmark.extra_info['first_response'] = result['first_response']
+    benchmark.extra_info['rss_mb'] = result['master']['rss']
+    report.append(f"cold start {benchmark.name}: first response after {result['first_response']:.2f} s, "
+                  f"RSS {result['master']['rss']:.0f} MB")
+
+
+@pytest.mark.benchmark(group='startup workers')
+@pytest.mark.parametrize('preload', [False, True], ids=['lazy', 'preload'])
+def bench_forked_workers(benchmark, data_dir, players, preload):
+    # Four workers forked from the master, each renders one chart, memory is measured after the render
+    url = f'/api/shotchart?season={SEASON}&playerId={players["medium"]}'
+    result = benchmark.pedantic(start, args=(data_dir, preload, 4, url), rounds=1)
+    assert all(worker['status'] == 200 for worker in result['workers'])
+    workers = result['workers']
+    benchmark.extra_info['master_rss_mb'] = result['master']['rss']
+    benchmark.extra_info['renderers_per_worker'] = workers[0]['renderers']
+    for field in ('rss', 'pss', 'private'):
+        benchmark.extra_info[f'worker_{field}_mb'] = sum(worker[field] for worker in workers) / len(workers)
+    report.append(f"forked workers {benchmark.name}: master RSS {result['master']['rss']:.0f} MB, per worker "
+                  f"with {workers[0]['renderers']} render processes "
+                  f"RSS {benchmark.extra_info['worker_rss_mb']:.0f} MB, PSS {benchmark.extra_info['worker_pss_mb']:.0f} "
+                  f"MB, private {benchmark.extra_info['worker_private_mb']:.0f} MB")
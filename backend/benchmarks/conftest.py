@@ -0,0 +1,65 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Benchmarks import backend modules the same way app.py does
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from synthetic import shot_volumes, write_data
+from utils.artifact_store import artifact_store
+from utils.render_cache import render_cache
+from utils.render_pool import render_pool
+from utils.season_store import season_store
+
+SEASON = '2019-20'
+# Players whose charts are benchmarked, by number of shots they took
+VOLUMES = {'low': 60, 'medium': 450, 'high': 1800}
+# Rest of the season is filled with this many players of realistic volumes
+SEASON_PLAYERS = int(os.environ.get('BENCH_SEASON_PLAYERS', 450))
+
+# Lines printed after the benchmark tables, for measurements which aren't timings
+report = []
+
+
+def pytest_terminal_summary(terminalreporter):
+    if report:
+        terminalreporter.section("memory")
+        for line in report:
+            terminalreporter.write_line(line)
+
+
+@pytest.fixture(scope='session')
+def data_dir(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('data')
+    shots = write_data(directory, SEASON, list(VOLUMES.values()) + shot_volumes(SEASON_PLAYERS), seed=0)
+    # First players of the generated season are the ones with VOLUMES shots
+    player_ids = shots.PLAYER_ID.drop_duplicates().tolist()[:len(VOLUMES)]
+    return directory, dict(zip(VOLUMES, player_ids))
+
+
+@pytest.fixture(scope='session', autouse=True)
+def backend(data_dir):
+    """
+    Points the backend at the synthetic data, renders on the calling thread so the benchmarks measure the rendering
+    itself and turns off the precomputed artifacts.
+    """
+    directory, _ = data_dir
+    season_store.shots_path = str(directory / 'shots')
+    season_store.league_avg_path = str(directory / 'league_avg')
+    render_pool.workers = 0
+    artifact_store.path = None
+    yield
+    render_cache.clear()
+
+
+@pytest.fixture(scope='session')
+def players(data_dir):
+    return data_dir[1]
+
+
+@pytest.fixture(scope='session')
+def client():
+    from app import create_app
+    return create_app().test_client()
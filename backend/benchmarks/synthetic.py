@@ -0,0 +1,196 @@
+"""
+Generator of synthetic, but realistic looking, season shot files and league averages. Same seed always produces the
+same files, so benchmarks run on identical data on every machine.
+
+It can also be used to get local data for development:
+
+    python backend/benchmarks/synthetic.py <output directory> --players 450
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from nba_api.stats.static import players as static_players, teams as static_teams
+
+# Made shot probability per SHOT_ZONE_BASIC
+MAKE_PROBABILITY = {
+    'Restricted Area': 0.63,
+    'In The Paint (Non-RA)': 0.41,
+    'Mid-Range': 0.40,
+    'Left Corner 3': 0.39,
+    'Right Corner 3': 0.38,
+    'Above the Break 3': 0.35,
+    'Backcourt': 0.02,
+}
+
+
+def shot_locations(rng, count):
+    """
+    Draws LOC_X and LOC_Y (tenths of a foot, hoop at 0, 0) from a mixture of rim, paint, mid-range, corner three,
+    above the break three and rare backcourt shots.
+
+    :return: Tuple of integer numpy arrays.
+    """
+    kind = rng.choice(6, size=count, p=[0.30, 0.12, 0.16, 0.08, 0.335, 0.005])
+    x, y = np.empty(count), np.empty(count)
+
+    rim = kind == 0
+    x[rim], y[rim] = rng.normal(0, 14, rim.sum()), rng.normal(6, 12, rim.sum())
+    paint = kind == 1
+    x[paint], y[paint] = rng.uniform(-80, 80, paint.sum()), rng.uniform(-40, 140, paint.sum())
+    mid = kind == 2
+    angle, radius = rng.uniform(0, np.pi, mid.sum()), rng.uniform(90, 225, mid.sum())
+    x[mid], y[mid] = radius * np.cos(angle), radius * np.sin(angle)
+    corner = kind == 3
+    x[corner] = rng.choice([-1, 1], corner.sum()) * rng.uniform(222, 245, corner.sum())
+    y[corner] = rng.uniform(-45, 85, corner.sum())
+    above = kind == 4
+    angle, radius = rng.uniform(0.38, np.pi - 0.38, above.sum()), rng.uniform(238, 275, above.sum())
+    x[above], y[above] = radius * np.cos(angle), radius * np.sin(angle)
+    backcourt = kind == 5
+    x[backcourt], y[backcourt] = rng.uniform(-240, 240, backcourt.sum()), rng.uniform(430, 800, backcourt.sum())
+
+    x = np.clip(np.round(x), -250, 250).astype(np.int64)
+    y = np.clip(np.round(y), -50, 880).astype(np.int64)
+    return x, y
+
+
+def shot_zones(x, y):
+    """
+    Assigns SHOT_ZONE_BASIC, SHOT_ZONE_AREA and SHOT_ZONE_RANGE the same way the NBA stats do (positive LOC_X is
+    the left side of the court).
+
+    :return: Tuple of three object numpy arrays.
+    """
+    distance = np.hypot(x, y) / 10.0
+    corner = (np.abs(x) >= 220) & (y <= 92)
+    backcourt = y > 422
+    three = ~backcourt & (corner | (distance >= 23.75))
+    restricted = ~three & ~backcourt & (distance < 4)
+    paint = ~three & ~backcourt & ~restricted & (np.abs(x) < 80) & (y < 143)
+    mid = ~three & ~backcourt & ~restricted & ~paint
+
+    side = np.where(np.abs(x) < 80, 'Center(C)', np.where(x > 0, 'Left Side(L)', 'Right Side(R)'))
+    side_center = np.where(np.abs(x) < 80, 'Center(C)',
+                           np.where(x > 0, 'Left Side Center(LC)', 'Right Side Center(RC)'))
+    range_ = np.select([distance < 8, distance < 16, distance < 24], ['Less Than 8 ft.', '8-16 ft.', '16-24 ft.'],
+                       '24+ ft.')
+
+    basic = np.select(
+        [backcourt, restricted, paint, mid, corner & (x > 0), corner],
+        ['Backcourt', 'Restricted Area', 'In The Paint (Non-RA)', 'Mid-Range', 'Left Corner 3', 'Right Corner 3'],
+        'Above the Break 3')
+    paint_side = np.where(np.abs(x) < 40, 'Center(C)', np.where(x > 0, 'Left Side(L)', 'Right Side(R)'))
+    area = np.select(
+        [backcourt, restricted, paint, three & ~corner, mid & (range_ == '16-24 ft.') & (y > 92)],
+        ['Back Court(BC)', 'Center(C)', paint_side, side_center, side_center],
+        side)
+    range_ = np.select(
+        [backcourt, three, mid & (range_ == 'Less Than 8 ft.'), mid & (range_ == '24+ ft.')],
+        ['Back Court Shot', '24+ ft.', '8-16 ft.', '16-24 ft.'],
+        range_)
+    return basic.astype(object), area.astype(object), range_.astype(object)
+
+
+def generate_season(shot_volumes, seed=0, season_start=20191022):
+    """
+    Generates shots of a season, one player for every entry of shot_volumes with that many shots. Players and
+    teams are real NBA ones from nba_api, so everything which looks them up by id works.
+
+    :return: DataFrame with the same columns as the shot chart detail files.
+    """
+    rng = np.random.default_rng(seed)
+    all_players = sorted(static_players.get_active_players(), key=lambda player: player['id'])
+    all_teams = sorted(static_teams.get_teams(), key=lambda team: team['id'])
+    chosen = rng.choice(len(all_players), size=len(shot_volumes), replace=len(shot_volumes) > len(all_players))
+
+    frames = []
+    for index, (player_index, volume) in enumerate(zip(chosen, shot_volumes)):
+        player = all_players[player_index]
+        team = all_teams[index % len(all_teams)]
+        opponents = [all_teams[opponent] for opponent in rng.choice(len(all_teams), size=volume)]
+        home = rng.random(volume) < 0.5
+
+        x, y = shot_locations(rng, volume)
+        basic, area, range_ = shot_zones(x, y)
+        made = rng.random(volume) < np.vectorize(MAKE_PROBABILITY.get)(basic)
+        games = np.sort(rng.integers(0, 82, size=volume))
+
+        frames.append(pd.DataFrame({
+            'GRID_TYPE': 'Shot Chart Detail',
+            'GAME_ID': 21900001 + games * 15 + index % 15,
+            'GAME_EVENT_ID': rng.integers(2, 700, size=volume),
+            'PLAYER_ID': player['id'],
+            'PLAYER_NAME': player['full_name'],
+            'TEAM_ID': team['id'],
+            'TEAM_NAME': team['full_name'],
+            'PERIOD': rng.choice([1, 2, 3, 4, 5], size=volume, p=[0.26, 0.25, 0.25, 0.23, 0.01]),
+            'MINUTES_REMAINING': rng.integers(0, 12, size=volume),
+            'SECONDS_REMAINING': rng.integers(0, 60, size=volume),
+            'EVENT_TYPE': np.where(made, 'Made Shot', 'Missed Shot'),
+            'ACTION_TYPE': 'Jump Shot',
+            'SHOT_TYPE': np.where(range_ == '24+ ft.', '3PT Field Goal', '2PT Field Goal'),
+            'SHOT_ZONE_BASIC': basic,
+            'SHOT_ZONE_AREA': area,
+            'SHOT_ZONE_RANGE': range_,
+            'SHOT_DISTANCE': (np.hypot(x, y) / 10).astype(np.int64),
+            'LOC_X': x,
+            'LOC_Y': y,
+            'SHOT_ATTEMPTED_FLAG': 1,
+            'SHOT_MADE_FLAG': made.astype(np.int64),
+            'GAME_DATE': (pd.Timestamp(str(season_start)) + pd.to_timedelta(games * 2, unit='D'))
+            .strftime('%Y%m%d').astype(int),
+            'HTM': [team['abbreviation'] if is_home else opponent['abbreviation']
+                    for is_home, opponent in zip(home, opponents)],
+            'VTM': [opponent['abbreviation'] if is_home else team['abbreviation']
+                    for is_home, opponent in zip(home, opponents)],
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def league_average(shots):
+    """
+    :return: DataFrame with the same columns as the league average files, computed from the shots.
+    """
+    frame = shots.groupby(by=['SHOT_ZONE_BASIC', 'SHOT_ZONE_AREA', 'SHOT_ZONE_RANGE']).agg(
+        FGA=('SHOT_ATTEMPTED_FLAG', 'sum'), FGM=('SHOT_MADE_FLAG', 'sum')).reset_index()
+    frame['FG_PCT'] = (frame.FGM / frame.FGA).round(3)
+    frame.insert(0, 'GRID_TYPE', 'League Averages')
+    return frame
+
+
+def shot_volumes(players, seed=0):
+    """
+    :return: Realistic number of shots per player, from end of the bench players to high volume scorers.
+    """
+    rng = np.random.default_rng(seed)
+    return np.clip(rng.lognormal(mean=5.8, sigma=0.9, size=players), 5, 2000).astype(int).tolist()
+
+
+def write_data(directory, season='2019-20', volumes=None, seed=0):
+    """
+    Writes <directory>/shots/<season>.csv and <directory>/league_avg/<season>.csv, the same layout which
+    SHOTS_PATH and LEAGUE_AVG_PATH point to.
+
+    :return: DataFrame with the generated shots.
+    """
+    directory = Path(directory)
+    shots = generate_season(volumes if volumes is not None else shot_volumes(450, seed), seed=seed)
+    (directory / 'shots').mkdir(parents=True, exist_ok=True)
+    (directory / 'league_avg').mkdir(parents=True, exist_ok=True)
+    shots.to_csv(directory / 'shots' / f"{season}.csv", index=False)
+    league_average(shots).to_csv(directory / 'league_avg' / f"{season}.csv", index=False)
+    return shots
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate synthetic season shot data.")
+    parser.add_argument('directory')
+    parser.add_argument('--season', default='2019-20')
+    parser.add_argument('--players', type=int, default=450)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    generated = write_data(args.directory, args.season, shot_volumes(args.players, args.seed), args.seed)
+    print(f"Wrote {len(generated)} shots of {args.players} players")
@@ -0,0 +1,107 @@
+import argparse
+
+import pandas as pd
+
+from utils.artifact_store import artifact_store, precompute_season
+from utils.columnar import columnar_path, write_season
+from utils.headshots import headshot_provider
+from utils.season_store import file_version, season_store
+
+
+def ingest(args):
+    seasons = args.seasons or [season for season in season_store.seasons() if season_store.season_path(season).exists()]
+    for season in seasons:
+        csv_path = season_store.season_path(season)
+        out_dir = columnar_path(season_store.shots_path, season)
+        if not args.force and season_store.source(season)[1][0] == 'columnar':
+            print(f"{season}: up to date")
+            continue
+        rows = write_season(csv_path, out_dir, source_version=file_version(csv_path))
+        print(f"{season}: wrote {rows} shots to {out_dir}")
+
+
+def append(args):
+    season_data = season_store.get(args.season)
+    shots = pd.concat([pd.read_csv(path) for path in args.files], ignore_index=True)
+    missing = [column for column in season_data.shots.columns if column not in shots.columns]
+    if missing:
+        raise SystemExit(f"{args.season}: shots are missing columns {', '.join(missing)}")
+    if 'GAME_ID' in shots.columns:
+        # Games which are already in the season are skipped, so appending the same file twice does nothing
+        shots = shots.loc[~shots.GAME_ID.isin(season_data.shots.GAME_ID.unique())]
+    if shots.empty:
+        print(f"{args.season}: no new games")
+        return
+    delta = season_store.add_delta(args.season, shots.loc[:, list(season_data.shots.columns)])
+    print(f"{args.season}: appended {len(shots)} shots of {shots.PLAYER_ID.nunique()} players as delta {delta}")
+
+
+def precompute(args):
+    for season in args.seasons or season_store.seasons():
+        players = precompute_season(season, artifact_store, workers=args.workers, with_png=args.png,
+                                    force=args.force)
+        if players is None:
+            print(f"{season}: up to date")
+        else:
+            print(f"{season}: computed {players} players")
+
+
+def memory(args):
+    total = 0
+    for season in sorted(args.seasons or season_store.seasons()):
+        size = season_store.get(season).memory_usage()
+        total += size
+        print(f"{season}: {size / 2 ** 20:.1f} MB")
+    print(f"total: {total / 2 ** 20:.1f} MB")
+
+
+def headshots(args):
+    for season in args.seasons or season_store.seasons():
+        season_data = season_store.get(season)
+        # Same team as the one plot_headshot uses, the team of the first shot of the player
+        starts = [start for start, _ in season_data.player_offsets.values()]
+        team_ids = season_data.shots.TEAM_ID.to_numpy()[starts]
+        players = list(zip(team_ids.tolist(), season_data.player_offsets))
+        cached = headshot_provider.prefetch(season, players, workers=args.workers)
+        print(f"{season}: {cached} of {len(players)} headshots cached")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Maintenance commands for the bballytics backend.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = subparsers.add_parser('ingest', help="Convert season CSVs into the memory-mappable columnar "
+                                                         "format.")
+    ingest_parser.add_argument('seasons', nargs='*', help="Seasons to convert, all seasons if none are given.")
+    ingest_parser.add_argument('--force', action='store_true', help="Convert even if the columnar copy is up to "
+                                                                    "date.")
+    ingest_parser.set_defaults(func=ingest)
+
+    append_parser = subparsers.add_parser('append', help="Add shots of new games to a season, they are merged into "
+                                                         "the season without reading it again.")
+    append_parser.add_argument('season', help="Season to which the shots are added.")
+    append_parser.add_argument('files', nargs='+', help="CSVs with the shots, same columns as the season CSV.")
+    append_parser.set_defaults(func=append)
+
+    precompute_parser = subparsers.add_parser('precompute', help="Compute binned data (and PNGs) of every player "
+                                                                 "into the artifact store.")
+    precompute_parser.add_argument('seasons', nargs='*', help="Seasons to compute, all seasons if none are given.")
+    precompute_parser.add_argument('--png', action='store_true', help="Render the shotcharts as well.")
+    precompute_parser.add_argument('--workers', type=int, default=None, help="Number of processes, defaults to "
+                                                                             "number of cores.")
+    precompute_parser.add_argument('--force', action='store_true', help="Compute even if players didn't change.")
+    precompute_parser.set_defaults(func=precompute)
+
+    memory_parser = subparsers.add_parser('memory', help="Show how much memory the shots of every season take in "
+                                                         "each server process.")
+    memory_parser.add_argument('seasons', nargs='*', help="Seasons to load, all seasons if none are given.")
+    memory_parser.set_defaults(func=memory)
+
+    headshots_parser = subparsers.add_parser('headshots', help="Download headshots of every player into the "
+                                                               "headshot cache.")
+    headshots_parser.add_argument('seasons', nargs='*', help="Seasons to download, all seasons if none are given.")
+    headshots_parser.add_argument('--workers', type=int, default=8, help="Number of parallel downloads.")
+    headshots_parser.set_defaults(func=headshots)
+
+    args = parser.parse_args()
+    args.func(args)
@@ -0,0 +1,45 @@
+import hashlib
+
+from flask_restful import Resource, abort
+from flask_restful.reqparse import RequestParser
+from utils.constants import LEADERBOARD_MIN_ATTEMPTS, LEADERBOARD_LIMIT, MAX_LEADERBOARD_LIMIT
+from utils.leaderboards import LEVELS
+from utils.metrics import timed
+from utils.render_cache import json_response, not_modified
+from utils.season_store import SeasonNotFound, season_store
+
+
+class Leaderboards(Resource):
+    """
+    Best shooters of a season in every zone, with their percentile rank among the players who have enough attempts
+    in that zone.
+    """
+
+    def get(self):
+        parser = RequestParser()
+        parser.add_argument('season', type=str, required=True, location='args')
+        parser.add_argument('groupBy', type=str, required=False, default='zone', choices=list(LEVELS), location='args')
+        parser.add_argument('zone', type=str, required=False, location='args')
+        parser.add_argument('minAttempts', type=int, required=False, default=LEADERBOARD_MIN_ATTEMPTS, location='args')
+        parser.add_argument('limit', type=int, required=False, default=LEADERBOARD_LIMIT, location='args')
+
+        args = parser.parse_args()
+        season = args['season']
+        if not 1 <= args['limit'] <= MAX_LEADERBOARD_LIMIT:
+            abort(400, message=f"limit has to be between 1 and {MAX_LEADERBOARD_LIMIT}")
+        zones = [zone.strip() for zone in args['zone'].split(",") if zone.strip()] if args['zone'] else None
+
+        try:
+            season_data = season_store.get(season)
+        except SeasonNotFound as error:
+            abort(404, message=str(error))
+        etag = hashlib.sha1(repr((season, season_data.version, season_data.deltas, args['groupBy'], zones,
+                                  args['minAttempts'], args['limit'])).encode('utf-8')).hexdigest()
+        if not_modified(etag):
+            return json_response(None, etag, season_data.last_modified)
+
+        leaderboards = season_data.leaderboards()
+        with timed('leaders'):
+            payload = {'season': season, 'groupBy': args['groupBy'], 'minAttempts': args['minAttempts'],
+                       'zones': leaderboards.leaders(args['groupBy'], zones, args['minAttempts'], args['limit'])}
+        return json_response(payload, etag, season_data.last_modified)
@@ -0,0 +1,17 @@
+from flask import make_response
+from flask_restful import Resource
+from utils.metrics import metrics
+from utils.season_store import season_store
+
+
+class Metrics(Resource):
+    """
+    Latency histograms, cache counters and memory of loaded seasons in the Prometheus text format.
+    """
+
+    def get(self):
+        for season, size in season_store.memory_usage().items():
+            metrics.set('bballytics_season_bytes', size, season=season)
+        response = make_response(metrics.render())
+        response.headers["Content-Type"] = "text/plain; version=0.0.4; charset=utf-8"
+        return response
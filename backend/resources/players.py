@@ -1,21 +1,46 @@
-from flask_restful import Resource
+import hashlib
+
+from flask_restful import Resource, abort
 from flask_restful.reqparse import RequestParser
-from utils.constants import SHOTS_PATH
-from pathlib import  Path
-import pandas as pd
+from utils.constants import MAX_PLAYERS_LIMIT
+from utils.render_cache import json_response, not_modified
+from utils.season_store import SeasonNotFound, season_store
+
 
 class Players(Resource):
 
     def get(self):
 
         parser = RequestParser()
-        parser.add_argument('season', type=str, required=False, default="2019-20")
+        parser.add_argument('season', type=str, required=False, default="2019-20", location='args')
+        parser.add_argument('q', type=str, required=False, location='args')
+        parser.add_argument('limit', type=int, required=False, location='args')
         args = parser.parse_args()
         season = args['season']
+        if args['limit'] is not None and not 1 <= args['limit'] <= MAX_PLAYERS_LIMIT:
+            abort(400, message=f"limit has to be between 1 and {MAX_PLAYERS_LIMIT}")
+
+        try:
+            season_data = season_store.get(season)
+        except SeasonNotFound as error:
+            abort(404, message=str(error))
+        etag = hashlib.sha1(repr((season, season_data.version, season_data.deltas, args['q'],
+                                  args['limit'])).encode('utf-8')).hexdigest()
+        if not_modified(etag):
+            return json_response(None, etag, season_data.last_modified)
+
+        players = season_data.roster().search(args['q'], args['limit'])
+        payload = [{"PLAYER_ID": player_id, "PLAYER_NAME": name} for player_id, name in players]
+        return json_response(payload, etag, season_data.last_modified)
+
 
-        data_path = (Path(SHOTS_PATH) / season).with_suffix('.csv')
+class PlayerSeasons(Resource):
+    """
+    Seasons in which the player has shots, so the same player can be found across seasons.
+    """
 
-        players_df = pd.read_csv(data_path)
-        unique_df: pd.DataFrame = players_df.drop_duplicates(subset="PLAYER_ID")
-        unique_df = unique_df.loc[:, ["PLAYER_ID", "PLAYER_NAME"]].sort_values(by='PLAYER_NAME', ascending=True)
-        return unique_df.to_dict(orient="records")
\ No newline at end of file
+    def get(self, player_id):
+        seasons = season_store.player_seasons(player_id)
+        if not seasons:
+            abort(404, message=f"Player {player_id} has no shots in any season")
+        return {"PLAYER_ID": player_id, "PLAYER_NAME": seasons[-1][1], "seasons": [season for season, _ in seasons]}
@@ -1,11 +1,8 @@
-import os
-
 from flask_restful import Resource
-from utils.constants import SHOTS_PATH
+from utils.season_store import season_store
 
 
 class Seasons(Resource):
 
     def get(self):
-        paths = os.listdir(SHOTS_PATH)
-        return [path.split(".")[0] for path in paths if ".csv" in path]
+        return season_store.seasons()
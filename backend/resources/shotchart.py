@@ -1,40 +1,72 @@
-from pathlib import Path
-import  io
-from flask import make_response
-from flask_restful import Resource
+from flask_restful import Resource, abort
 from flask_restful.reqparse import RequestParser
-from matplotlib.backends.backend_agg import FigureCanvasAgg
-import  pandas as pd
-from utils.constants import SHOTS_PATH, LEAGUE_AVG_PATH
-from utils.shotchart_tools import plot_shotchart, create_bins
-from nba_api.stats.static.players import find_player_by_id
+from utils.artifact_store import artifact_store
+from utils.constants import SHOTCHART_RESOLUTIONS, DEFAULT_RESOLUTION
+from utils.metrics import timed
+from utils.render_cache import render_cache, conditional_response, not_modified
+from utils.render_pool import render_pool, RenderPoolBusy
+from utils.season_store import SeasonNotFound, season_store
+from utils.shot_index import add_filter_arguments, parse_filters
 
 
 class Shotchart(Resource):
 
     def get(self):
         parser = RequestParser()
-        parser.add_argument('season', type=str, required=True)
-        parser.add_argument('playerId', type=int, required=True)
+        parser.add_argument('season', type=str, required=True, location='args')
+        parser.add_argument('playerId', type=int, required=True, location='args')
+        parser.add_argument('resolution', type=int, required=False, choices=SHOTCHART_RESOLUTIONS, location='args')
+        parser.add_argument('shape', type=str, required=False, default='square', choices=['square', 'hex'],
+                            location='args')
+        add_filter_arguments(parser)
 
         args = parser.parse_args()
         season = args['season']
         player_id = args['playerId']
-        player_name = find_player_by_id(player_id=player_id)["full_name"]
+        try:
+            filters = parse_filters(args)
+        except ValueError as error:
+            abort(400, message=str(error))
 
-        data_path = (Path(SHOTS_PATH) / season).with_suffix('.csv')
+        try:
+            season_data = season_store.get(season)
+        except SeasonNotFound as error:
+            abort(404, message=str(error))
+        version = season_store.version(season)
+        # Key changes only when this player gets new shots, not when shots of other players are appended
+        player_version = season_store.player_version(season, player_id)
+        # Everything which changes the image has to be a part of the key
+        render_options = {}
+        if (args['resolution'] or DEFAULT_RESOLUTION) != DEFAULT_RESOLUTION or args['shape'] != 'square':
+            render_options = {'resolution': args['resolution'] or DEFAULT_RESOLUTION, 'shape': args['shape']}
+        # Filtered charts are cached under their own keys
+        key = render_cache.make_key(season, player_id, player_version, dict(render_options, **filters))
+        if not_modified(key):
+            return conditional_response(None, key, season_data.last_modified)
 
-        players_df = pd.read_csv(data_path)
-        target_player_df = players_df.loc[players_df.PLAYER_ID == player_id]
+        png = render_cache.get(season, version, key)
+        if png is None and not render_options and not filters:
+            # Precomputed charts are rendered only with default options and all shots
+            png = artifact_store.get(season, player_id, 'png', player_version)
+            if png is not None:
+                render_cache.put(season, version, key, png)
+        if png is None:
+            if player_id not in season_data.player_offsets:
+                abort(404, message=f"Player {player_id} has no shots in {season} season")
+            if filters:
+                try:
+                    no_shots = season_data.player_shots(player_id, filters).empty
+                except ValueError as error:
+                    abort(400, message=str(error))
+                if no_shots:
+                    abort(404, message=f"Player {player_id} has no shots which pass the filters in {season} season")
+            with timed('player'):
+                player_name = season_data.player_name(player_id)
+            try:
+                png = render_pool.render(season, player_id, f"Shotchart for {player_name} in {season} season",
+                                         render_options, filters)
+            except RenderPoolBusy as error:
+                abort(503, message=str(error))
+            render_cache.put(season, version, key, png)
 
-        league_avg = (Path(LEAGUE_AVG_PATH) / season).with_suffix('.csv')
-        league_avg_df = pd.read_csv(league_avg)
-        binned_df = create_bins(data_frame=target_player_df, league_average=league_avg_df)
-
-        figure = plot_shotchart(original_df=target_player_df, data_frame=binned_df, title=f"Shotchart for {player_name} in {season} season")
-        canvas = FigureCanvasAgg(figure)
-        output = io.BytesIO()
-        canvas.print_png(output)
-        response = make_response(output.getvalue())
-        response.headers["Content-Type"] = "image/png"
-        return response
\ No newline at end of file
+        return conditional_response(png, key, season_data.last_modified)
@@ -0,0 +1,98 @@
+import hashlib
+import io
+import zipfile
+
+from flask_restful import Resource, abort
+from flask_restful.reqparse import RequestParser
+from utils.constants import MAX_BATCH_PLAYERS
+from utils.metrics import timed
+from utils.render_cache import render_cache, conditional_response, not_modified
+from utils.render_pool import render_pool, RenderPoolBusy
+from utils.season_store import SeasonNotFound, season_store
+
+# Earliest time zip can store
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+class ShotchartBatch(Resource):
+    """
+    Shotcharts of many players in one request, either for the given list of players or for every player who took
+    a shot for the given team. Charts are returned as a zip with one PNG per player or as a single grid image.
+    """
+
+    def get(self):
+        parser = RequestParser()
+        parser.add_argument('season', type=str, required=True, location='args')
+        parser.add_argument('playerIds', type=str, required=False, location='args')
+        parser.add_argument('teamId', type=int, required=False, location='args')
+        parser.add_argument('format', type=str, required=False, default='zip', choices=['zip', 'grid'], location='args')
+
+        args = parser.parse_args()
+        season = args['season']
+        team_id = args['teamId']
+
+        try:
+            season_data = season_store.get(season)
+        except SeasonNotFound as error:
+            abort(404, message=str(error))
+        team_players = None
+        if team_id is not None:
+            team_players = season_data.team_players(team_id)
+
+        if args['playerIds']:
+            try:
+                player_ids = [int(player_id) for player_id in args['playerIds'].split(",") if player_id.strip()]
+            except ValueError:
+                abort(400, message="playerIds has to be a comma separated list of player ids")
+        elif team_players is not None:
+            player_ids = team_players
+        else:
+            abort(400, message="Either playerIds or teamId is required")
+
+        # Players without shots (for the team) don't get a chart
+        player_ids = [player_id for player_id in dict.fromkeys(player_ids) if player_id in season_data.player_offsets
+                      and (team_players is None or player_id in team_players)]
+        if not player_ids:
+            abort(404, message=f"No shots found for these players in {season} season")
+        if len(player_ids) > MAX_BATCH_PLAYERS:
+            abort(400, message=f"At most {MAX_BATCH_PLAYERS} players can be rendered at once")
+
+        version = season_store.version(season)
+        # Charts of a team contain only shots for that team, so they are cached separately from player charts
+        cache_options = {'teamId': team_id} if team_id is not None else {}
+        keys = [render_cache.make_key(season, player_id, season_store.player_version(season, player_id), cache_options)
+                for player_id in player_ids]
+        etag = hashlib.sha1(":".join(keys + [args['format']]).encode('utf-8')).hexdigest()
+        content_type = "application/zip" if args['format'] == 'zip' else "image/png"
+        if not_modified(etag):
+            return conditional_response(None, etag, season_data.last_modified, content_type)
+
+        pngs = {player_id: render_cache.get(season, version, key) for player_id, key in zip(player_ids, keys)}
+        missing = [player_id for player_id in player_ids if pngs[player_id] is None]
+        if missing:
+            with timed('player'):
+                titles = [f"Shotchart for {season_data.player_name(player_id)} in {season} season"
+                          for player_id in missing]
+            try:
+                rendered = render_pool.render_batch(season, missing, titles, {}, team_id=team_id)
+            except RenderPoolBusy as error:
+                abort(503, message=str(error))
+            for player_id, png in zip(missing, rendered):
+                pngs[player_id] = png
+                render_cache.put(season, version, keys[player_ids.index(player_id)], png)
+
+        with timed('compose'):
+            if args['format'] == 'grid':
+                from utils.shotchart_tools import compose_grid
+                payload = compose_grid([pngs[player_id] for player_id in player_ids])
+            else:
+                output = io.BytesIO()
+                with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED) as archive:
+                    for player_id in player_ids:
+                        # Entries don't get the current time, so the same ETag always means the same bytes
+                        entry = zipfile.ZipInfo(f"{player_id}.png", date_time=ZIP_DATE_TIME)
+                        entry.external_attr = 0o644 << 16
+                        archive.writestr(entry, pngs[player_id])
+                payload = output.getvalue()
+
+        return conditional_response(payload, etag, season_data.last_modified, content_type)
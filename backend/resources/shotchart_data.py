@@ -0,0 +1,67 @@
+from flask_restful import Resource, abort
+from flask_restful.reqparse import RequestParser
+from utils.artifact_store import artifact_store
+from utils.metrics import timed
+from utils.render_cache import render_cache, conditional_response, not_modified
+from utils.season_store import SeasonNotFound, season_store
+from utils.shot_index import add_filter_arguments, parse_filters
+from utils.shotchart_data import shotchart_data, encode_json, encode_binary
+
+encoders = {
+    'json': (encode_json, "application/json"),
+    'binary': (encode_binary, "application/octet-stream"),
+}
+
+
+class ShotchartData(Resource):
+    """
+    Binned shots and zone labels of a player, so the shotchart can be drawn on the client instead of the server.
+    """
+
+    def get(self):
+        parser = RequestParser()
+        parser.add_argument('season', type=str, required=True, location='args')
+        parser.add_argument('playerId', type=int, required=True, location='args')
+        parser.add_argument('format', type=str, required=False, default='json', choices=list(encoders), location='args')
+        add_filter_arguments(parser)
+
+        args = parser.parse_args()
+        season = args['season']
+        player_id = args['playerId']
+        encode, content_type = encoders[args['format']]
+        try:
+            filters = parse_filters(args)
+        except ValueError as error:
+            abort(400, message=str(error))
+
+        try:
+            season_data = season_store.get(season)
+        except SeasonNotFound as error:
+            abort(404, message=str(error))
+        version = season_store.version(season)
+        player_version = season_store.player_version(season, player_id)
+        key = render_cache.make_key(season, player_id, player_version, dict(filters, format=args['format']))
+        if not_modified(key):
+            return conditional_response(None, key, season_data.last_modified, content_type)
+
+        payload = render_cache.get(season, version, key)
+        if payload is None and not filters:
+            payload = artifact_store.get(season, player_id, args['format'], player_version)
+            if payload is not None:
+                render_cache.put(season, version, key, payload)
+        if payload is None:
+            try:
+                target_player_df = season_data.player_shots(player_id, filters)
+            except ValueError as error:
+                abort(400, message=str(error))
+            if target_player_df.empty:
+                abort(404, message=f"Player {player_id} has no shots in {season} season")
+            league_average = season_store.league_average(season)
+            from utils.shotchart_tools import create_bins
+            with timed('bins'):
+                binned_df = create_bins(data_frame=target_player_df, league_average=league_average)
+            with timed('encode'):
+                payload = encode(*shotchart_data(target_player_df, binned_df))
+            render_cache.put(season, version, key, payload)
+
+        return conditional_response(payload, key, season_data.last_modified, content_type)
@@ -0,0 +1,66 @@
+import shutil
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Tests import backend modules the same way app.py does, data is generated with the benchmark generator
+BACKEND = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(BACKEND / 'benchmarks'))
+
+from synthetic import shot_volumes, write_data
+from utils.artifact_store import artifact_store
+from utils.render_cache import render_cache
+from utils.render_pool import render_pool
+from utils.season_store import season_store
+
+SEASON = '2019-20'
+
+
+@pytest.fixture(scope='session')
+def data_dir(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('data')
+    write_data(directory, SEASON, [600, 300] + shot_volumes(40), seed=1)
+    return directory
+
+
+@pytest.fixture(scope='session')
+def shots(data_dir):
+    """
+    Generated shots as they are on disk, for computing expected results with plain pandas.
+    """
+    return pd.read_csv(data_dir / 'shots' / f"{SEASON}.csv")
+
+
+@pytest.fixture(autouse=True)
+def backend(data_dir, tmp_path, monkeypatch):
+    """
+    Points the backend at a copy of the generated data, so tests which change the files don't affect the others,
+    renders on the calling thread and turns off the precomputed artifacts.
+    """
+    shutil.copytree(data_dir, tmp_path / 'data')
+    monkeypatch.setattr(season_store, 'shots_path', str(tmp_path / 'data' / 'shots'))
+    monkeypatch.setattr(season_store, 'league_avg_path', str(tmp_path / 'data' / 'league_avg'))
+    for cache in ['_seasons', '_league_averages', '_columnar_meta', '_delta_files']:
+        monkeypatch.setattr(season_store, cache, {})
+    monkeypatch.setattr(render_pool, 'workers', 0)
+    monkeypatch.setattr(artifact_store, 'path', None)
+    render_cache.clear()
+    yield
+    render_cache.clear()
+
+
+@pytest.fixture(scope='session')
+def client():
+    from app import create_app
+    return create_app().test_client()
+
+
+@pytest.fixture(scope='session')
+def player_ids(shots):
+    """
+    Players with the most shots first.
+    """
+    return shots.PLAYER_ID.value_counts().index.tolist()
@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from tests.conftest import SEASON
+from utils.constants import MAX_PLAYERS_LIMIT
+
+
+@pytest.mark.parametrize('url', [
+    '/api/players?season=1900-01',
+    '/api/leaderboards?season=1900-01',
+    '/api/shotchart?season=1900-01&playerId=1',
+    '/api/shotchart/data?season=1900-01&playerId=1',
+    '/api/shotchart/batch?season=1900-01&playerIds=1',
+])
+def test_unknown_season_is_not_found(client, url):
+    assert client.get(url).status_code == 404
+
+
+@pytest.mark.parametrize('limit', [-2, 0, MAX_PLAYERS_LIMIT + 1])
+def test_players_limit_out_of_range(client, limit):
+    assert client.get(f'/api/players?season={SEASON}&limit={limit}').status_code == 400
+
+
+def test_players_search(client, shots):
+    players = client.get(f'/api/players?season={SEASON}').get_json()
+    assert sorted(player['PLAYER_ID'] for player in players) == sorted(shots.PLAYER_ID.unique())
+
+    name = players[0]['PLAYER_NAME']
+    found = client.get(f'/api/players?season={SEASON}&q={name.split()[-1].lower()}&limit=1').get_json()
+    assert len(found) == 1
+    assert name.split()[-1] in found[0]['PLAYER_NAME']
+
+
+@pytest.mark.parametrize('path', ['/api/shotchart', '/api/shotchart/data', '/api/players'])
+def test_etag_returns_not_modified(client, player_ids, path):
+    url = f'{path}?season={SEASON}&playerId={player_ids[0]}'
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    cached = client.get(url, headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+    assert client.get(url, headers={'If-None-Match': '"other"'}).status_code == 200
+
+
+def test_filters_limit_the_shots(client, shots, player_ids):
+    player_id = player_ids[0]
+    url = f'/api/shotchart/data?season={SEASON}&playerId={player_id}'
+    first_period = client.get(url + '&period=1').get_json()
+    assert first_period['zones'] != client.get(url).get_json()['zones']
+
+    player_shots = shots[(shots.PLAYER_ID == player_id) & (shots.PERIOD == 1)]
+    made = player_shots.groupby(['SHOT_ZONE_BASIC', 'SHOT_ZONE_AREA', 'SHOT_ZONE_RANGE']).SHOT_MADE_FLAG.sum()
+    assert first_period['zones']
+    for zone in first_period['zones']:
+        assert zone['made'] == made[tuple(zone['zone'])]
+
+
+@pytest.mark.parametrize('path', ['/api/shotchart', '/api/shotchart/data'])
+@pytest.mark.parametrize('filters', ['', '&period=1'])
+def test_unknown_player_is_not_found(client, path, filters):
+    url = f'{path}?season={SEASON}&playerId=1{filters}'
+    assert client.get(url).status_code == 404
+    # Nothing is cached for the missing player
+    assert client.get(url).status_code == 404
+
+
+def test_batch_zip_is_the_same_for_the_same_etag(client, player_ids, monkeypatch):
+    url = f'/api/shotchart/batch?season={SEASON}&playerIds={player_ids[0]},{player_ids[1]}'
+    first = client.get(url)
+    assert first.status_code == 200
+
+    # Zip of a later request doesn't depend on when it was written
+    monkeypatch.setattr(time, 'localtime', lambda *args: time.struct_time((2001, 2, 3, 4, 5, 6, 0, 0, 0)))
+    second = client.get(url)
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert second.data == first.data
@@ -0,0 +1,23 @@
+import pandas as pd
+import pytest
+
+from tests.conftest import SEASON
+from utils.bin_pyramid import BinPyramid, rows_per_resolution
+from utils.constants import SHOTCHART_RESOLUTIONS
+from utils.shotchart_tools import create_bins, unique_bins
+
+
+@pytest.fixture(scope='module')
+def pyramid(shots):
+    return BinPyramid(shots)
+
+
+@pytest.mark.parametrize('resolution', SHOTCHART_RESOLUTIONS)
+def test_pyramid_matches_create_bins(data_dir, shots, player_ids, pyramid, resolution):
+    league_average = pd.read_csv(data_dir / 'league_avg' / f"{SEASON}.csv")
+    for player_id in [player_ids[0], player_ids[len(player_ids) // 2], player_ids[-1]]:
+        expected = unique_bins(create_bins(shots[shots.PLAYER_ID == player_id], bin_number_x=resolution,
+                                           bin_number_y=rows_per_resolution(resolution),
+                                           league_average=league_average))
+        binned = pyramid.bins(player_id, resolution, league_average=league_average)
+        pd.testing.assert_frame_equal(binned, expected, check_exact=True)
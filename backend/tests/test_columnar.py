@@ -0,0 +1,57 @@
+import io
+import zipfile
+
+import pandas as pd
+
+from tests.conftest import SEASON
+from utils.columnar import columnar_path, write_season
+from utils.render_cache import render_cache
+from utils.season_store import ColumnarSeasonData, file_version, season_store
+
+
+def ingest():
+    csv_path = season_store.season_path(SEASON)
+    write_season(csv_path, columnar_path(season_store.shots_path, SEASON), source_version=file_version(csv_path))
+
+
+def responses(client, shots, player_ids):
+    team_id = shots.TEAM_ID.iloc[0]
+    urls = [f'/api/players?season={SEASON}',
+            f'/api/leaderboards?season={SEASON}&minAttempts=5',
+            f'/api/shotchart/data?season={SEASON}&playerId={player_ids[0]}&format=binary',
+            f'/api/shotchart/data?season={SEASON}&playerId={player_ids[0]}&period=1,2',
+            f'/api/shotchart?season={SEASON}&playerId={player_ids[1]}&resolution=60']
+    payloads = []
+    for url in urls:
+        response = client.get(url)
+        assert response.status_code == 200, url
+        payloads.append(response.data)
+    batch = client.get(f'/api/shotchart/batch?season={SEASON}&teamId={team_id}')
+    assert batch.status_code == 200
+    archive = zipfile.ZipFile(io.BytesIO(batch.data))
+    payloads.append({name: archive.read(name) for name in archive.namelist()})
+    return payloads
+
+
+def test_columnar_season_serves_the_same_data(client, shots, player_ids):
+    from_csv = responses(client, shots, player_ids)
+    ingest()
+    render_cache.clear()
+
+    assert isinstance(season_store.get(SEASON), ColumnarSeasonData)
+    assert responses(client, shots, player_ids) == from_csv
+    # Nothing above needs the whole season, it stays in the memory-mapped columns
+    assert season_store.get(SEASON)._shots is None
+
+
+def test_league_average_from_columnar_shots(player_ids):
+    season_store.league_average_path(SEASON).unlink()
+    from_csv = season_store.league_average(SEASON).frame
+    ingest()
+
+    season_data = season_store.get(SEASON)
+    assert isinstance(season_data, ColumnarSeasonData)
+    pd.testing.assert_frame_equal(season_store.league_average(SEASON).frame, from_csv, check_categorical=False,
+                                  check_dtype=False)
+    season_data.bin_pyramid().bins(player_ids[0], resolution=60)
+    assert season_data._shots is None
@@ -0,0 +1,21 @@
+from pathlib import Path
+
+import pandas as pd
+
+from tests.conftest import SEASON
+from utils.shotchart_tools import create_bins
+
+# Columns which the original create_bins, the one looping over the shots, added for two of the generated players
+REFERENCE = Path(__file__).parent / 'reference' / 'create_bins.csv'
+
+
+def test_create_bins_matches_the_reference(data_dir, shots):
+    reference = pd.read_csv(REFERENCE, float_precision='round_trip')
+    league_average = pd.read_csv(data_dir / 'league_avg' / f"{SEASON}.csv")
+    player_ids = shots.PLAYER_ID.unique()
+    for position, expected in reference.groupby('PLAYER'):
+        expected = expected.drop(columns='PLAYER').reset_index(drop=True)
+        binned = create_bins(shots[shots.PLAYER_ID == player_ids[position]], league_average=league_average)
+        assert list(binned.columns) == list(shots.columns) + list(expected.columns)
+        pd.testing.assert_frame_equal(binned.loc[:, expected.columns].reset_index(drop=True), expected,
+                                      check_exact=True)
@@ -0,0 +1,63 @@
+from tests.conftest import SEASON
+from utils.season_store import season_store
+
+
+def new_game(shots, player_id):
+    """
+    :return: Shots of the player from one game, moved to a game after the end of the season.
+    """
+    player_shots = shots[shots.PLAYER_ID == player_id]
+    game = player_shots[player_shots.GAME_ID == player_shots.GAME_ID.iloc[0]].copy()
+    game['GAME_ID'] = shots.GAME_ID.max() + 1
+    game['GAME_DATE'] = shots.GAME_DATE.max() + 1
+    return game
+
+
+def test_delta_is_merged(shots, player_ids):
+    player_id = player_ids[1]
+    before = season_store.get(SEASON)
+    game = new_game(shots, player_id)
+
+    assert season_store.add_delta(SEASON, game) == 1
+    after = season_store.get(SEASON)
+    assert after.deltas == 1
+    assert len(after.shots) == len(before.shots) + len(game)
+    player_shots = after.player_shots(player_id)
+    assert len(player_shots) == len(before.player_shots(player_id)) + len(game)
+    # New shots go after the ones the player already had
+    assert player_shots.GAME_ID.iloc[-len(game):].tolist() == game.GAME_ID.tolist()
+    # Season which was already handed out stays as it was
+    assert len(before.shots) == len(shots)
+
+
+def test_delta_invalidates_only_its_players(client, shots, player_ids):
+    changed, unchanged = player_ids[:2]
+    responses = {player_id: client.get(f'/api/shotchart/data?season={SEASON}&playerId={player_id}')
+                 for player_id in (changed, unchanged)}
+    versions = {player_id: season_store.player_version(SEASON, player_id) for player_id in (changed, unchanged)}
+
+    season_store.add_delta(SEASON, new_game(shots, changed))
+
+    assert season_store.player_version(SEASON, changed) != versions[changed]
+    assert season_store.player_version(SEASON, unchanged) == versions[unchanged]
+    url = f'/api/shotchart/data?season={SEASON}&playerId='
+    stale = client.get(url + str(changed), headers={'If-None-Match': responses[changed].headers['ETag']})
+    assert stale.status_code == 200
+    assert stale.data != responses[changed].data
+    fresh = client.get(url + str(unchanged), headers={'If-None-Match': responses[unchanged].headers['ETag']})
+    assert fresh.status_code == 304
+
+
+def test_delta_updates_leaderboards(client, shots, player_ids):
+    player_id = player_ids[0]
+    url = f'/api/leaderboards?season={SEASON}&groupBy=basic&minAttempts=1&limit=100'
+
+    def attempts():
+        zones = client.get(url).get_json()['zones']
+        return sum(leader['attempted'] for zone in zones for leader in zone['leaders']
+                   if leader['PLAYER_ID'] == player_id)
+
+    before = attempts()
+    game = new_game(shots, player_id)
+    season_store.add_delta(SEASON, game)
+    assert attempts() == before + len(game)
@@ -0,0 +1,87 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from utils.headshots import HEADSHOT_SIZE, HeadshotProvider, placeholder
+
+# Player ids the local CDN knows what to do with
+FOUND, MISSING, SLOW = 1, 2, 3
+
+
+class CdnHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.path)
+        player_id = int(self.path.rsplit('/', 1)[-1].removesuffix('.png'))
+        if player_id == MISSING:
+            self.send_error(404)
+            return
+        if player_id == SLOW:
+            # Client is gone by the time it would be answered
+            time.sleep(1)
+            return
+        output = BytesIO()
+        Image.new('RGB', (130, 95), (200, 0, 0)).save(output, format='PNG')
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(output.getvalue())))
+        self.end_headers()
+        self.wfile.write(output.getvalue())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def cdn():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), CdnHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    CdnHandler.requests = []
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_headshot_is_resized(cdn, tmp_path):
+    provider = HeadshotProvider(base_url=cdn, cache_dir=tmp_path)
+    image = provider.get(1610612737, '2019-20', FOUND)
+    assert image.shape == (HEADSHOT_SIZE[1], HEADSHOT_SIZE[0], 4)
+    assert tuple(image[0, 0]) == (200, 0, 0, 255)
+    assert CdnHandler.requests == ['/1610612737/2019-20/260x190/1.png']
+
+
+def test_missing_headshot_is_placeholder(cdn, tmp_path):
+    provider = HeadshotProvider(base_url=cdn, cache_dir=tmp_path)
+    assert provider.get(1610612737, '2019-20', MISSING) is placeholder()
+    # Remembered in memory only, so the player isn't downloaded again until restart
+    assert provider.get(1610612737, '2019-20', MISSING) is placeholder()
+    assert len(CdnHandler.requests) == 1
+    assert not list(tmp_path.rglob('*.npy'))
+
+
+def test_timed_out_headshot_is_placeholder(cdn, tmp_path):
+    provider = HeadshotProvider(base_url=cdn, cache_dir=tmp_path, timeout=0.1)
+    assert provider.get(1610612737, '2019-20', SLOW) is placeholder()
+    # Nothing is remembered, next render tries again
+    requests = len(CdnHandler.requests)
+    assert provider.get(1610612737, '2019-20', SLOW) is placeholder()
+    assert len(CdnHandler.requests) > requests
+
+
+def test_headshots_are_cached_on_disk(cdn, tmp_path):
+    image = HeadshotProvider(base_url=cdn, cache_dir=tmp_path).get(1610612737, '2019-20', FOUND)
+    assert len(list(tmp_path.rglob('*.npy'))) == 1
+
+    # Another process with the same cache directory doesn't download it again
+    cached = HeadshotProvider(base_url=cdn, cache_dir=tmp_path).get(1610612737, '2019-20', FOUND)
+    np.testing.assert_array_equal(cached, image)
+    assert not cached.flags.writeable
+    assert len(CdnHandler.requests) == 1
@@ -0,0 +1,51 @@
+import pytest
+
+from tests.conftest import SEASON
+from utils.constants import MAX_LEADERBOARD_LIMIT
+from utils.leaderboards import LEVELS
+
+
+def reference_leaders(shots, columns, min_attempts, limit):
+    """
+    Leaderboards computed directly with pandas: best FG% first, ties go to more attempts and then lower PLAYER_ID.
+
+    :return: Dict of zone -> (number of qualified players, list of (PLAYER_ID, made, attempted, percentile)).
+    """
+    totals = shots.groupby(['PLAYER_ID'] + columns).agg(
+        made=('SHOT_MADE_FLAG', 'sum'), attempted=('SHOT_ATTEMPTED_FLAG', 'sum')).reset_index()
+    totals = totals[totals.attempted >= min_attempts]
+    totals['pct'] = totals.made / totals.attempted
+    leaders = {}
+    for zone, players in totals.groupby(columns):
+        zone = tuple(zone) if isinstance(zone, tuple) else (zone,)
+        # Percentage of qualified players whose FG% is the same or lower
+        percentiles = players.pct.rank(method='max', pct=True) * 100
+        players = players.assign(percentile=percentiles).sort_values(
+            ['pct', 'attempted', 'PLAYER_ID'], ascending=[False, False, True])
+        leaders[zone] = (len(players), [(row.PLAYER_ID, row.made, row.attempted, round(row.percentile, 1))
+                                        for row in players.head(limit).itertuples()])
+    return leaders
+
+
+@pytest.mark.parametrize('level', list(LEVELS))
+def test_leaders_match_pandas(client, shots, level):
+    response = client.get(f'/api/leaderboards?season={SEASON}&groupBy={level}&minAttempts=10&limit=5')
+    assert response.status_code == 200
+
+    expected = reference_leaders(shots, LEVELS[level], min_attempts=10, limit=5)
+    zones = {tuple(zone['zone']): zone for zone in response.get_json()['zones'] if zone['qualified']}
+    assert set(zones) == set(expected)
+    for zone, (qualified, leaders) in expected.items():
+        assert zones[zone]['qualified'] == qualified
+        assert [(leader['PLAYER_ID'], leader['made'], leader['attempted'], leader['percentile'])
+                for leader in zones[zone]['leaders']] == leaders
+
+
+def test_leaders_of_one_zone(client):
+    payload = client.get(f'/api/leaderboards?season={SEASON}&groupBy=basic&zone=Mid-Range').get_json()
+    assert [zone['zone'] for zone in payload['zones']] == [['Mid-Range']]
+
+
+@pytest.mark.parametrize('limit', [0, MAX_LEADERBOARD_LIMIT + 1])
+def test_limit_out_of_range(client, limit):
+    assert client.get(f'/api/leaderboards?season={SEASON}&limit={limit}').status_code == 400
@@ -0,0 +1,22 @@
+import logging
+
+import pandas as pd
+
+from utils.league_average import LeagueAverageTable
+
+
+def test_missing_zones_fall_back_to_similar_zones(caplog):
+    table = LeagueAverageTable(pd.DataFrame({
+        'SHOT_ZONE_BASIC': ['Mid-Range', 'Mid-Range', 'Restricted Area'],
+        'SHOT_ZONE_AREA': ['Left Side(L)', 'Right Side(R)', 'Center(C)'],
+        'SHOT_ZONE_RANGE': ['8-16 ft.', '8-16 ft.', 'Less Than 8 ft.'],
+        'FG_PCT': [0.4, 0.5, 0.6],
+    }))
+    zones = [('Mid-Range', 'Left Side(L)', '8-16 ft.'), ('Mid-Range', 'Center(C)', '8-16 ft.'),
+             ('Backcourt', 'Back Court(BC)', 'Back Court Shot')]
+
+    with caplog.at_level(logging.WARNING, logger='utils.league_average'):
+        for _ in range(3):
+            fg_pct = table.lookup(zones)
+            assert fg_pct.tolist() == [0.4, 0.45, 0.5]
+    assert len(caplog.records) == 1
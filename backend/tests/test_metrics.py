@@ -0,0 +1,53 @@
+import threading
+
+from flask import Flask
+
+from utils import metrics
+
+
+def profiled_app(profile_dir, started=None, release=None):
+    app = Flask(__name__)
+    metrics.init_app(app, profile_dir=str(profile_dir), slow_seconds=0)
+
+    @app.route('/wait')
+    def wait():
+        started.set()
+        release.wait(5)
+        return 'done'
+
+    @app.route('/fast')
+    def fast():
+        return 'done'
+
+    @app.route('/fail')
+    def fail():
+        raise RuntimeError
+
+    return app
+
+
+def test_one_request_is_profiled_at_a_time(tmp_path):
+    started, release = threading.Event(), threading.Event()
+    app = profiled_app(tmp_path, started, release)
+    slow = threading.Thread(target=lambda: app.test_client().get('/wait'))
+    slow.start()
+    try:
+        assert started.wait(5)
+        # Profiler of the first request is still active, this one is served without profiling
+        assert app.test_client().get('/fast').status_code == 200
+        assert not list(tmp_path.glob('*fast*.prof'))
+    finally:
+        release.set()
+        slow.join()
+    assert list(tmp_path.glob('*wait*.prof'))
+
+    assert app.test_client().get('/fast').status_code == 200
+    assert list(tmp_path.glob('*fast*.prof'))
+
+
+def test_failed_request_stops_its_profiler(tmp_path):
+    app = profiled_app(tmp_path)
+    app.config['PROPAGATE_EXCEPTIONS'] = False
+    assert app.test_client().get('/fail').status_code == 500
+    assert app.test_client().get('/fast').status_code == 200
+    assert list(tmp_path.glob('*fast*.prof'))
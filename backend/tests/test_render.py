@@ -0,0 +1,48 @@
+import hashlib
+import json
+from io import BytesIO
+from pathlib import Path
+
+import matplotlib
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image
+
+from tests.conftest import SEASON
+from utils.shotchart_tools import create_bins, plot_shotchart, render_shotchart_png
+
+# Hashes of the pixels which the original plot_shotchart, the one drawing the whole figure, rendered for two of the
+# generated players. Other matplotlib versions can draw slightly differently.
+REFERENCE = json.loads((Path(__file__).parent / 'reference' / 'shotchart_png.json').read_text())
+
+
+def player_bins(data_dir, shots, position):
+    league_average = pd.read_csv(data_dir / 'league_avg' / f"{SEASON}.csv")
+    player_shots = shots[shots.PLAYER_ID == shots.PLAYER_ID.unique()[position]]
+    return player_shots, create_bins(player_shots, league_average=league_average)
+
+
+def pixels_hash(png):
+    pixels = np.asarray(Image.open(BytesIO(png)).convert('RGBA'))
+    return hashlib.sha256(pixels.tobytes()).hexdigest()
+
+
+@pytest.mark.parametrize('shape', ['square', 'hex'])
+def test_background_render_matches_full_draw(data_dir, shots, shape):
+    player_shots, binned = player_bins(data_dir, shots, 1)
+    png = render_shotchart_png(player_shots, binned, "Player 1", shape=shape)
+
+    output = BytesIO()
+    FigureCanvasAgg(plot_shotchart(player_shots, binned, "Player 1", shape=shape)).print_png(output)
+    assert png == output.getvalue()
+
+
+@pytest.mark.skipif(matplotlib.__version__ != REFERENCE['matplotlib'],
+                    reason=f"Reference was rendered with matplotlib {REFERENCE['matplotlib']}")
+@pytest.mark.parametrize('position', [1, 14])
+def test_render_matches_the_reference(data_dir, shots, position):
+    player_shots, binned = player_bins(data_dir, shots, position)
+    png = render_shotchart_png(player_shots, binned, f"Player {position}")
+    assert pixels_hash(png) == REFERENCE['pixels_sha256'][str(position)]
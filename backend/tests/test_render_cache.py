@@ -0,0 +1,30 @@
+import os
+
+import utils.render_cache
+from tests.conftest import SEASON
+from utils.render_cache import RenderCache
+
+
+def test_disk_tier_keeps_recently_used_entries(tmp_path):
+    cache = RenderCache(max_entries=0, disk_path=tmp_path, max_disk_bytes=1000)
+    cache.put(SEASON, (1,), 'a', b'a' * 400)
+    cache.put(SEASON, (1,), 'b', b'b' * 400)
+    os.utime(cache._disk_file(SEASON, (1,), 'a'), (1000, 1000))
+    os.utime(cache._disk_file(SEASON, (1,), 'b'), (2000, 2000))
+
+    # Reading from disk makes a the most recently used, so b is removed when c doesn't fit
+    assert cache.get(SEASON, (1,), 'a') == b'a' * 400
+    cache.put(SEASON, (1,), 'c', b'c' * 400)
+    assert cache.get(SEASON, (1,), 'b') is None
+    assert cache.get(SEASON, (1,), 'a') == b'a' * 400
+    assert cache.get(SEASON, (1,), 'c') == b'c' * 400
+
+
+def test_new_renderer_changes_etag(client, player_ids, monkeypatch):
+    url = f'/api/shotchart?season={SEASON}&playerId={player_ids[0]}'
+    etag = client.get(url).headers['ETag']
+
+    monkeypatch.setattr(utils.render_cache, 'renderer_version', lambda: 'changed')
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+
+from tests.conftest import SEASON
+from utils.render_pool import RenderPool, RenderPoolBusy, render_pool
+
+
+def test_full_queue_rejects_renders():
+    pool = RenderPool(workers=0, queue_size=1)
+    started, release = threading.Event(), threading.Event()
+
+    def wait():
+        started.set()
+        return release.wait(5)
+
+    thread = threading.Thread(target=pool._run, args=(wait,))
+    thread.start()
+    try:
+        assert started.wait(5)
+        with pytest.raises(RenderPoolBusy):
+            pool._run(time.sleep, 0)
+    finally:
+        release.set()
+        thread.join()
+    assert pool._run(len, [1, 2]) == 2
+
+
+def test_full_queue_is_service_unavailable(client, player_ids, monkeypatch):
+    monkeypatch.setattr(render_pool, '_slots', threading.BoundedSemaphore(1))
+    render_pool._slots.acquire()
+    assert client.get(f'/api/shotchart?season={SEASON}&playerId={player_ids[0]}').status_code == 503
+    assert client.get(f'/api/shotchart/batch?season={SEASON}&playerIds={player_ids[0]}').status_code == 503
+
+
+def test_timed_out_render_keeps_its_slot():
+    pool = RenderPool(workers=1, queue_size=1, timeout=60)
+    try:
+        # Worker is started by the first render, so the timeout doesn't include starting it
+        pool._run(time.sleep, 0)
+        pool.timeout = 0.5
+        with pytest.raises(RenderPoolBusy, match="didn't finish"):
+            pool._run(time.sleep, 2)
+        with pytest.raises(RenderPoolBusy, match="Too many"):
+            pool._run(time.sleep, 0)
+
+        # Slot is given back once the slow render finishes in the worker
+        pool.timeout = 60
+        deadline = time.monotonic() + 10
+        while not pool._slots.acquire(blocking=False):
+            assert time.monotonic() < deadline
+            time.sleep(0.1)
+        pool._slots.release()
+        assert pool._run(len, [1, 2]) == 2
+    finally:
+        pool.shutdown()
+
+
+def test_preloaded_app_renders_on_request_threads(monkeypatch):
+    from app import create_app
+
+    monkeypatch.setattr(render_pool, 'workers', 4)
+    create_app(preload=True)
+    assert render_pool.workers == 0
@@ -0,0 +1,57 @@
+import json
+import struct
+
+import numpy as np
+
+from tests.conftest import SEASON
+
+
+def decode_binary(data):
+    """
+    Reads the layout written by encode_binary the same way the client does.
+
+    :return: Tuple of dict of column -> numpy array and list of zone labels.
+    """
+    header_length, = struct.unpack_from('<I', data)
+    header = json.loads(data[4:4 + header_length])
+    offset = 4 + header_length
+    columns = {}
+    for column in header['columns']:
+        dtype = np.dtype(column['type']).newbyteorder('<')
+        columns[column['name']] = np.frombuffer(data, dtype=dtype, count=header['bins'], offset=offset)
+        offset += header['bins'] * dtype.itemsize
+    assert offset == len(data)
+    return columns, header['zones']
+
+
+def test_binary_and_json_hold_the_same_bins(client, player_ids):
+    url = f'/api/shotchart/data?season={SEASON}&playerId={player_ids[0]}'
+    as_json = client.get(url + '&format=json')
+    as_binary = client.get(url + '&format=binary')
+    assert as_json.status_code == as_binary.status_code == 200
+    assert as_binary.content_type == 'application/octet-stream'
+
+    json_payload = as_json.get_json()
+    columns, zones = decode_binary(as_binary.data)
+    assert set(columns) == set(json_payload['bins'])
+    assert len(columns['BIN_LOC_X']) > 0
+    for name, values in columns.items():
+        # JSON floats are rounded to two decimals
+        np.testing.assert_allclose(values, json_payload['bins'][name], atol=0.005 + 1e-6)
+    assert columns['LOC_RAW_COUNTS'].sum() > 0
+
+    assert [zone['zone'] for zone in zones] == [zone['zone'] for zone in json_payload['zones']]
+    np.testing.assert_allclose([zone['pct'] for zone in zones], [zone['pct'] for zone in json_payload['zones']],
+                               atol=0.005 + 1e-6)
+
+
+def test_zone_labels_match_the_shots(client, shots, player_ids):
+    player_id = player_ids[1]
+    payload = client.get(f'/api/shotchart/data?season={SEASON}&playerId={player_id}').get_json()
+
+    player_shots = shots[shots.PLAYER_ID == player_id]
+    expected = player_shots.groupby(['SHOT_ZONE_BASIC', 'SHOT_ZONE_AREA', 'SHOT_ZONE_RANGE']).agg(
+        made=('SHOT_MADE_FLAG', 'sum'), attempted=('SHOT_ATTEMPTED_FLAG', 'sum'))
+    assert payload['zones']
+    for zone in payload['zones']:
+        assert (zone['made'], zone['attempted']) == tuple(expected.loc[tuple(zone['zone'])])
@@ -0,0 +1,23 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from tests.conftest import SEASON
+from utils.bin_pyramid import rows_per_resolution
+from utils.shotchart_tools import create_bins, unique_bins
+from utils.zones import zone_labels
+
+# Labels which the original zone_labels, the one looping over the zones, found for three of the generated players
+REFERENCE = Path(__file__).parent / 'reference' / 'zone_labels.json'
+
+
+def test_zone_labels_match_the_reference(data_dir, shots):
+    league_average = pd.read_csv(data_dir / 'league_avg' / f"{SEASON}.csv")
+    player_ids = shots.PLAYER_ID.unique()
+    for expected in json.loads(REFERENCE.read_text()):
+        player_shots = shots[shots.PLAYER_ID == player_ids[expected['player']]]
+        binned = create_bins(player_shots, bin_number_x=expected['resolution'],
+                             bin_number_y=rows_per_resolution(expected['resolution']), league_average=league_average)
+        labels = zone_labels(player_shots, unique_bins(binned))
+        assert [dict(label, zone=list(label['zone'])) for label in labels] == expected['labels']
@@ -0,0 +1,153 @@
+import multiprocessing
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from utils.constants import ARTIFACTS_DB
+from utils.metrics import metrics
+from utils.render_cache import version_tag
+from utils.season_store import season_store
+from utils.shotchart_data import shotchart_data, encode_json, encode_binary
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    season TEXT NOT NULL,
+    player_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    version TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (season, player_id, kind)
+);
+"""
+
+
+class ArtifactStore:
+    """
+    SQLite file with precomputed results for every player of every season: binned data in both encodings of
+    the data endpoint and optionally the rendered PNG. Every artifact is stored with the version of the player it
+    was computed from (see SeasonStore.player_version), so stale artifacts are never served and appending games
+    makes only the artifacts of players who played in them stale.
+    """
+
+    def __init__(self, path=ARTIFACTS_DB):
+        self.path = Path(path) if path else None
+        self._local = threading.local()
+
+    def _connect(self):
+        """
+        :return: Connection of the current thread, it is opened (and the schema created) only on its first use.
+        """
+        local = self._local
+        # Connections can't be shared between threads or with forked processes, and path can be changed
+        if getattr(local, 'connection', None) is None or local.owner != (os.getpid(), self.path):
+            local.connection = sqlite3.connect(self.path, timeout=30)
+            local.connection.executescript(SCHEMA)
+            local.owner = (os.getpid(), self.path)
+        return local.connection
+
+    def get(self, season, player_id, kind, version):
+        """
+        :return: Stored bytes or None if artifact is missing or was computed from a different version.
+        """
+        if self.path is None or not self.path.exists():
+            return None
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT data FROM artifacts WHERE season = ? AND player_id = ? AND kind = ? AND version = ?",
+                (season, player_id, kind, version_tag(version))).fetchone()
+        metrics.increment('bballytics_cache_requests_total', cache='artifacts', result='hit' if row else 'miss')
+        return row[0] if row is not None else None
+
+    def player_versions(self, season, kind):
+        """
+        :return: Dict of PLAYER_ID -> version tag of the stored artifact of the given kind.
+        """
+        if self.path is None or not self.path.exists():
+            return {}
+        with self._connect() as connection:
+            rows = connection.execute("SELECT player_id, version FROM artifacts WHERE season = ? AND kind = ?",
+                                      (season, kind)).fetchall()
+        return dict(rows)
+
+    def update_season(self, season, artifacts, removed_players=()):
+        """
+        Stores artifacts of some players of a season in a single transaction, artifacts of other players are kept.
+
+        :param artifacts: Iterable of (player_id, kind, version tag, bytes).
+        :param removed_players: Players who are no longer in the season, all of their artifacts are deleted.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.executemany("DELETE FROM artifacts WHERE season = ? AND player_id = ?",
+                                   ((season, player_id) for player_id in removed_players))
+            connection.executemany(
+                "INSERT OR REPLACE INTO artifacts (season, player_id, kind, version, data) VALUES (?, ?, ?, ?, ?)",
+                ((season, player_id, kind, tag, data) for player_id, kind, tag, data in artifacts))
+
+
+def compute_player_artifacts(season, player_ids, with_png=False):
+    """
+    Computes artifacts of the given players, shots of all of them are binned in a single pass.
+
+    :return: List of (player_id, kind, version tag, bytes).
+    """
+    from utils.shotchart_tools import create_bins, render_shotchart_png
+
+    season_data = season_store.get(season)
+    shots = pd.concat([season_data.player_shots(player_id) for player_id in player_ids], ignore_index=True)
+    binned_df = create_bins(data_frame=shots, league_average=season_store.league_average(season),
+                            group_by='PLAYER_ID')
+
+    artifacts = []
+    for player_id, player_rows in binned_df.groupby('PLAYER_ID').indices.items():
+        player_id = int(player_id)
+        # Version is taken here, from the same data the artifacts are computed from
+        tag = version_tag(season_store.player_version(season, player_id))
+        original_df, player_binned_df = shots.iloc[player_rows], binned_df.iloc[player_rows]
+        bins, labels = shotchart_data(original_df, player_binned_df)
+        artifacts.append((player_id, 'json', tag, encode_json(bins, labels)))
+        artifacts.append((player_id, 'binary', tag, encode_binary(bins, labels)))
+        if with_png:
+            player_name = season_data.player_name(player_id)
+            artifacts.append((player_id, 'png', tag, render_shotchart_png(
+                original_df=original_df, data_frame=player_binned_df,
+                title=f"Shotchart for {player_name} in {season} season")))
+    return artifacts
+
+
+def _set_paths(shots_path, league_avg_path):
+    season_store.shots_path = shots_path
+    season_store.league_avg_path = league_avg_path
+
+
+def precompute_season(season, store, workers=None, with_png=False, chunk_size=25, force=False):
+    """
+    Computes artifacts of the players of the season on a pool of processes and stores them. Only players whose
+    shots changed since the last run are computed, the rest of the season is left as it is.
+
+    :return: Number of players computed, None if season was up to date.
+    """
+    season_data = season_store.get(season)
+    stored = store.player_versions(season, 'png' if with_png else 'json')
+    player_ids = [player_id for player_id in season_data.player_offsets
+                  if force or stored.get(player_id) != version_tag(season_store.player_version(season, player_id))]
+    removed_players = [player_id for player_id in stored if player_id not in season_data.player_offsets]
+    if not player_ids and not removed_players:
+        return None
+
+    results = []
+    if player_ids:
+        chunks = [player_ids[start:start + chunk_size] for start in range(0, len(player_ids), chunk_size)]
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(processes=workers, initializer=_set_paths,
+                          initargs=(season_store.shots_path, season_store.league_avg_path)) as pool:
+            results = pool.starmap(compute_player_artifacts, [(season, chunk, with_png) for chunk in chunks])
+
+    store.update_season(season, (artifact for result in results for artifact in result), removed_players)
+    return len(player_ids)
+
+
+artifact_store = ArtifactStore()
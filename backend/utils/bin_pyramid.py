@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+
+from utils.league_average import ZONE_COLUMNS, as_league_table
+
+# Number of columns of the finest grid, every resolution has to divide it so its bins are made of whole cells
+FINE_RESOLUTION = 120
+
+# Same court dimensions as the defaults of create_bins
+WIDTH, HEIGHT, NORM_X, NORM_Y = 500, 300, 250, 48
+
+# Columns needed to build the pyramid
+PYRAMID_COLUMNS = ['PLAYER_ID', 'LOC_X', 'LOC_Y', 'SHOT_MADE_FLAG'] + ZONE_COLUMNS
+
+
+def _trunc_div(values, divisor):
+    # Integer division which truncates towards zero, the same way create_bins truncates the bin of a shot
+    return np.sign(values) * (np.abs(values) // divisor)
+
+
+def rows_per_resolution(resolution):
+    """
+    :return: Number of rows of the grid with the given number of columns, bins are squares like in create_bins.
+    """
+    return HEIGHT / (WIDTH / float(resolution))
+
+
+class BinPyramid:
+    """
+    Shots of a season counted on a fine grid: for every player, cell and zone the number of attempts, makes and the
+    row of the first shot. Square bins of any resolution which divides FINE_RESOLUTION, and hexagonal bins, are
+    made by summing the cells of a player, so binning takes about the same time no matter how many shots the
+    player took. It is built once per season, the same as the roster.
+
+    Cells are stored sparsely (only cells with shots) and sorted by player, so each player is a contiguous block.
+    """
+
+    def __init__(self, shots, rows=None):
+        """
+        :param shots: Shots of the season, only PYRAMID_COLUMNS are needed if rows is given.
+        :param rows: Function which returns all columns of the shots at the given positions, rows of the output of
+                     bins are taken from it. By default they are taken from shots.
+        """
+        self.rows = rows if rows is not None else (lambda positions: shots.iloc[positions].copy())
+        fine_rows = rows_per_resolution(FINE_RESOLUTION)
+        cell_x = np.trunc(((shots.LOC_X.to_numpy() + NORM_X) / float(WIDTH)) * FINE_RESOLUTION).astype(np.int64)
+        cell_y = np.trunc(((shots.LOC_Y.to_numpy() + NORM_Y) / float(HEIGHT)) * fine_rows).astype(np.int64)
+        zone_codes, self.zones = pd.MultiIndex.from_arrays([shots[column] for column in ZONE_COLUMNS]).factorize()
+
+        # Unique keys are sorted by player, return_index gives the first shot of every key
+        keys, first_rows, inverse = np.unique(
+            np.column_stack([shots.PLAYER_ID.to_numpy(), cell_x, cell_y, zone_codes]), axis=0, return_index=True,
+            return_inverse=True)
+        inverse = inverse.reshape(-1)
+        self.cell_x, self.cell_y, self.cell_zone = keys[:, 1], keys[:, 2], keys[:, 3]
+        self.attempts = np.bincount(inverse, minlength=len(keys))
+        self.makes = np.bincount(inverse, weights=shots.SHOT_MADE_FLAG.to_numpy(), minlength=len(keys))
+        self.first_rows = first_rows
+        self.restricted_zones = self.zones.get_level_values(0) == "Restricted Area"
+
+        player_ids, starts = np.unique(keys[:, 0], return_index=True)
+        ends = np.r_[starts[1:], len(keys)]
+        self.player_offsets = {int(player_id): (int(start), int(end))
+                               for player_id, start, end in zip(player_ids, starts, ends)}
+
+    def _square_bins(self, cell_x, cell_y, resolution):
+        factor = FINE_RESOLUTION // resolution
+        bin_x, bin_y = _trunc_div(cell_x, factor), _trunc_div(cell_y, factor)
+        bin_rows = rows_per_resolution(resolution)
+        # Middle of the bin, computed the same way as in create_bins
+        center_x = ((bin_x * float(WIDTH)) / resolution + ((bin_x + 1) * float(WIDTH)) / resolution) / 2 - NORM_X
+        center_y = ((bin_y * float(HEIGHT)) / bin_rows + ((bin_y + 1) * float(HEIGHT)) / bin_rows) / 2 - NORM_Y
+        return np.column_stack([bin_x, bin_y]), center_x, center_y
+
+    def _hex_bins(self, cell_x, cell_y, resolution):
+        # Pointy top hexagons, resolution of them next to each other across the court, placed by the middle of cells
+        fine_rows = rows_per_resolution(FINE_RESOLUTION)
+        x = (cell_x + 0.5) * WIDTH / FINE_RESOLUTION - NORM_X
+        y = (cell_y + 0.5) * HEIGHT / fine_rows - NORM_Y
+        size = WIDTH / float(resolution) / np.sqrt(3)
+        q = (np.sqrt(3) / 3 * x - y / 3) / size
+        r = (2 / 3 * y) / size
+
+        # Rounding of cube coordinates, the coordinate with the largest rounding error is fixed from the other two
+        s = -q - r
+        round_q, round_r, round_s = np.round(q), np.round(r), np.round(s)
+        diff_q, diff_r, diff_s = np.abs(round_q - q), np.abs(round_r - r), np.abs(round_s - s)
+        fix_q = (diff_q > diff_r) & (diff_q > diff_s)
+        fix_r = ~fix_q & (diff_r > diff_s)
+        round_q = np.where(fix_q, -round_r - round_s, round_q)
+        round_r = np.where(fix_r, -round_q - round_s, round_r)
+
+        center_x = size * (np.sqrt(3) * round_q + np.sqrt(3) / 2 * round_r)
+        center_y = size * (3 / 2 * round_r)
+        return np.column_stack([round_q, round_r]).astype(np.int64), center_x, center_y
+
+    def bins(self, player_id, resolution=30, shape='square', league_average=None):
+        """
+        Bins shots of the player at the given resolution.
+
+        :param resolution: Number of bins across the court, has to divide FINE_RESOLUTION.
+        :param shape: 'square' or 'hex'.
+        :return: DataFrame with one row per bin and the same columns as the output of create_bins reduced with
+                 unique_bins, rows are in the order of the first shot of each bin.
+        """
+        if FINE_RESOLUTION % resolution:
+            raise ValueError(f"Resolution has to divide {FINE_RESOLUTION}, got {resolution}")
+        start, end = self.player_offsets.get(player_id, (0, 0))
+        cell_x, cell_y = self.cell_x[start:end], self.cell_y[start:end]
+        cell_zone, first_rows = self.cell_zone[start:end], self.first_rows[start:end]
+        attempts, makes = self.attempts[start:end], self.makes[start:end]
+
+        if shape == 'hex':
+            keys, center_x, center_y = self._hex_bins(cell_x, cell_y, resolution)
+        else:
+            keys, center_x, center_y = self._square_bins(cell_x, cell_y, resolution)
+        # Both coordinates packed into one integer, unique of a flat array is a lot faster than of rows
+        low = keys.min(axis=0, initial=0)
+        span = keys[:, 1].max(initial=0) - low[1] + 1
+        bin_keys, bin_of_cell = np.unique((keys[:, 0] - low[0]) * span + keys[:, 1] - low[1], return_inverse=True)
+        n_bins = len(bin_keys)
+
+        location_counts = np.bincount(bin_of_cell, weights=attempts, minlength=n_bins)
+        location_made = np.bincount(bin_of_cell, weights=makes, minlength=n_bins)
+        first_row = np.full(n_bins, np.iinfo(np.int64).max)
+        np.minimum.at(first_row, bin_of_cell, first_rows)
+
+        # Same scaling as in create_bins, restricted area bins don't count for the maximum
+        restricted_area = np.zeros(n_bins, dtype=bool)
+        restricted_area[bin_of_cell[self.restricted_zones[cell_zone]]] = True
+        max_out_of_restricted = location_counts[~restricted_area].max(initial=0)
+        if max_out_of_restricted <= 0:
+            max_out_of_restricted = location_counts.max(initial=0)
+        bin_size_x = float(WIDTH) / resolution
+        bin_size_y = float(HEIGHT) / rows_per_resolution(resolution)
+        max_size = int((int(bin_size_x) - 1) * (int(bin_size_y) - 1))
+
+        # Order of the bins is the order of their first shots, like in the output of unique_bins
+        order = np.argsort(first_row, kind='stable')
+        binned_df = self.rows(first_row[order])
+        centers = np.zeros((n_bins, 2))
+        centers[bin_of_cell, 0], centers[bin_of_cell, 1] = center_x, center_y
+        binned_df['BIN_LOC_X'] = centers[order, 0]
+        binned_df['BIN_LOC_Y'] = centers[order, 1]
+
+        shot_percent = location_made / location_counts
+        if league_average is not None:
+            # Zone with the most shots in each bin, ties go to the zone whose first shot came first
+            n_zones = len(self.zones)
+            pair_keys, pair_of_cell = np.unique(bin_of_cell * n_zones + cell_zone, return_inverse=True)
+            pair_of_cell = pair_of_cell.reshape(-1)
+            pair_counts = np.bincount(pair_of_cell, weights=attempts, minlength=len(pair_keys))
+            pair_first = np.full(len(pair_keys), np.iinfo(np.int64).max)
+            np.minimum.at(pair_first, pair_of_cell, first_rows)
+            pair_bins, pair_zones = pair_keys // n_zones, pair_keys % n_zones
+            pair_order = np.lexsort((pair_first, -pair_counts, pair_bins))
+            _, first_of_bin = np.unique(pair_bins[pair_order], return_index=True)
+            bin_zone = pair_zones[pair_order][first_of_bin]
+
+            zone_counts = np.bincount(cell_zone, weights=attempts, minlength=n_zones)
+            zone_made = np.bincount(cell_zone, weights=makes, minlength=n_zones)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                zone_percent = (zone_made / zone_counts)[bin_zone]
+            avg_percentage = as_league_table(league_average).lookup(self.zones[bin_zone])
+            binned_df['PCT_LEAGUE_AVG_COMPARISON'] = np.clip((shot_percent - avg_percentage) * 100, -10, 10)[order]
+            binned_df['PCT_LEAGUE_COMPARISON_ZONE'] = np.clip((zone_percent - avg_percentage) * 100, -10, 10)[order]
+            binned_df['LOC_ZONE_PERCENTAGE'] = (zone_percent * 100)[order]
+        binned_df['LOC_PERCENTAGE'] = (shot_percent * 100)[order]
+        value_to_scale = np.minimum(location_counts, max_out_of_restricted)
+        binned_df['LOC_COUNTS'] = ((value_to_scale / max_out_of_restricted) * max_size)[order]
+        binned_df['LOC_RAW_COUNTS'] = location_counts.astype(np.int64)[order]
+        return binned_df
@@ -0,0 +1,97 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.compact import read_shots
+
+# Suffix of the directory which holds the columnar copy of a season, e.g. shots/2019-20.columns/
+COLUMNAR_SUFFIX = '.columns'
+META_FILE = 'meta.json'
+OFFSETS_FILE = '_player_offsets.npy'
+# Changes whenever the layout or the set of stored columns changes, older copies are ignored until ingested again
+FORMAT_VERSION = 3
+
+
+def columnar_path(shots_path, season):
+    return Path(shots_path) / (season + COLUMNAR_SUFFIX)
+
+
+def write_season(csv_path, out_dir, source_version=None):
+    """
+    Converts season CSV into a directory with one .npy file per column, so that the columns can be memory-mapped
+    by every worker instead of each of them parsing its own copy of the CSV. Rows are sorted by PLAYER_ID and the
+    start and end row of every player are stored in a separate offsets file. Columns are stored in the compact
+    types of compact_shots, categoricals as their codes with the categories kept in the meta file.
+
+    :param csv_path: Path to the season CSV.
+    :param out_dir: Directory into which the columns are written, it is replaced if it already exists.
+    :param source_version: Version of the CSV, stored in meta so stale copies can be detected.
+    :return: Number of rows written.
+    """
+    shots = read_shots(csv_path)
+    shots = shots.sort_values(by='PLAYER_ID', kind='stable').reset_index(drop=True)
+
+    out_dir = Path(out_dir)
+    tmp_dir = out_dir.with_name(out_dir.name + '.tmp')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    meta = {'format': FORMAT_VERSION, 'source_version': source_version, 'rows': len(shots), 'columns': {}}
+    for column in shots.columns:
+        values = shots[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            np.save(tmp_dir / f"{column}.npy", values.cat.codes.to_numpy())
+            meta['columns'][column] = {'categories': [str(category) for category in values.cat.categories]}
+        else:
+            np.save(tmp_dir / f"{column}.npy", values.to_numpy())
+            meta['columns'][column] = {}
+
+    player_ids, starts = np.unique(shots.PLAYER_ID.to_numpy(), return_index=True)
+    ends = np.r_[starts[1:], len(shots)]
+    np.save(tmp_dir / OFFSETS_FILE, np.column_stack([player_ids, starts, ends]).astype(np.int64))
+
+    # Meta is written last, a directory without it is never read
+    with open(tmp_dir / META_FILE, 'w') as meta_file:
+        json.dump(meta, meta_file)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return len(shots)
+
+
+def read_meta(path):
+    with open(Path(path) / META_FILE) as meta_file:
+        return json.load(meta_file)
+
+
+def read_columns(path, meta):
+    """
+    Memory-maps every column of the columnar season.
+
+    :return: Tuple of dict with column name -> (array, CategoricalDtype or None) and the offsets array with
+             (PLAYER_ID, start, end) rows.
+    """
+    path = Path(path)
+    columns = {}
+    for column, info in meta['columns'].items():
+        values = np.load(path / f"{column}.npy", mmap_mode='r')
+        dtype = pd.CategoricalDtype(info['categories']) if 'categories' in info else None
+        columns[column] = (values, dtype)
+    offsets = np.load(path / OFFSETS_FILE)
+    return columns, offsets
+
+
+def decode_rows(columns, start=None, end=None, rows=None):
+    """
+    :param rows: Positions of the rows to decode, used instead of start and end if given.
+    :return: DataFrame with rows [start, end) of the memory-mapped columns, strings are categoricals.
+    """
+    data = {}
+    for column, (values, dtype) in columns.items():
+        values = np.asarray(values[start:end] if rows is None else values[rows])
+        data[column] = pd.Categorical.from_codes(values, dtype=dtype) if dtype is not None else values
+    return pd.DataFrame(data)
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from utils.constants import SHOT_COLUMNS, ZONE_CATEGORIES
+
+# Smallest types which fit every value of these columns, flags are bools so that sums of them don't overflow
+COLUMN_DTYPES = {
+    'PLAYER_ID': np.int32,
+    'TEAM_ID': np.int32,
+    'GAME_ID': np.int32,
+    'GAME_DATE': np.int32,
+    'PERIOD': np.int8,
+    'LOC_X': np.int16,
+    'LOC_Y': np.int16,
+    'SHOT_ATTEMPTED_FLAG': np.bool_,
+    'SHOT_MADE_FLAG': np.bool_,
+}
+
+
+def _categories(column, values):
+    # Known values keep their codes, values which aren't known are added after them
+    known = ZONE_CATEGORIES.get(column, [])
+    return known + sorted(set(values) - set(known))
+
+
+def _downcast(values, dtype):
+    if not pd.api.types.is_integer_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+        return values
+    if dtype is np.bool_:
+        return values.astype(dtype) if values.isin([0, 1]).all() else values
+    info = np.iinfo(dtype)
+    if len(values) and (values.min() < info.min or values.max() > info.max):
+        return values
+    return values.astype(dtype)
+
+
+def compact_shots(shots):
+    """
+    Keeps only the columns the backend uses, turns strings into categoricals and integers into the smallest type
+    which fits them. Zones get the categories from ZONE_CATEGORIES, so their codes can be used with
+    text_location_codes. Columns which don't fit their smaller type are left as they are.
+
+    :return: New DataFrame, takes a fraction of the memory of the one read with default types.
+    """
+    columns = {}
+    for column in [column for column in SHOT_COLUMNS if column in shots.columns]:
+        values = shots[column]
+        if values.dtype == object or isinstance(values.dtype, (pd.StringDtype, pd.CategoricalDtype)):
+            values = values.astype(pd.CategoricalDtype(_categories(column, values.dropna().unique())))
+        elif column in COLUMN_DTYPES:
+            values = _downcast(values, COLUMN_DTYPES[column])
+        columns[column] = values
+    return pd.DataFrame(columns)
+
+
+def read_shots(path):
+    """
+    Reads shots CSV with only the used columns, in the compact representation of compact_shots.
+    """
+    return compact_shots(pd.read_csv(path, usecols=lambda column: column in SHOT_COLUMNS))
+
+
+def concat_shots(frames):
+    """
+    Concatenates compacted shots. Categorical columns stay categoricals, with categories of all frames.
+    """
+    frames = list(frames)
+    columns = {}
+    for column in frames[0].columns:
+        parts = [frame[column] for frame in frames]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            dtype = pd.CategoricalDtype(_categories(column, set().union(*(part.cat.categories for part in parts))))
+            parts = [part.cat.set_categories(dtype.categories) for part in parts]
+        columns[column] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def memory_usage(shots):
+    """
+    :return: Bytes taken by the shots, including the strings of object columns.
+    """
+    return int(shots.memory_usage(deep=True, index=True).sum())
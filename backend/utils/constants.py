@@ -1,8 +1,73 @@
+import os
 
 DATA_PATH = "C:\\Users\\danie\\daniel_mapa\\mywork\\bballytics-web\\backend\\data"
 LEAGUE_AVG_PATH = "C:\\Users\\danie\\daniel_mapa\\mywork\\bballytics-web\\backend\\data\\league_avg"
 SHOTS_PATH = "C:\\Users\\danie\\daniel_mapa\\mywork\\bballytics-web\\backend\\data\\shots"
 
+# If there is no league average file for a season, league averages are computed from the shots of that season
+LEAGUE_AVG_FROM_SHOTS = True
+
+# Columns of the shot files which are used by the backend, everything else is dropped on ingestion
+SHOT_COLUMNS = ['PLAYER_ID', 'PLAYER_NAME', 'TEAM_ID', 'SHOT_ZONE_BASIC', 'SHOT_ZONE_AREA', 'SHOT_ZONE_RANGE',
+                'LOC_X', 'LOC_Y', 'SHOT_ATTEMPTED_FLAG', 'SHOT_MADE_FLAG', 'GAME_ID', 'GAME_DATE', 'PERIOD', 'HTM',
+                'VTM']
+
+# Every value of the zone columns, zones are stored as categoricals with these categories so the codes of a zone
+# are the same in every season. Sorted, so zones are ordered the same as their names.
+ZONE_CATEGORIES = {
+    'SHOT_ZONE_BASIC': sorted(['Restricted Area', 'In The Paint (Non-RA)', 'Mid-Range', 'Left Corner 3',
+                               'Right Corner 3', 'Above the Break 3', 'Backcourt']),
+    'SHOT_ZONE_AREA': sorted(['Center(C)', 'Left Side(L)', 'Right Side(R)', 'Left Side Center(LC)',
+                              'Right Side Center(RC)', 'Back Court(BC)']),
+    'SHOT_ZONE_RANGE': sorted(['Less Than 8 ft.', '8-16 ft.', '16-24 ft.', '24+ ft.', 'Back Court Shot']),
+}
+
+# Number of rendered shotcharts kept in memory, optional directory where they are also stored on disk and how many
+# bytes the directory can take before the least recently used files are removed
+RENDER_CACHE_SIZE = 256
+RENDER_CACHE_DIR = None
+RENDER_CACHE_DISK_BYTES = 512 * 1024 * 1024
+
+# Number of processes which render shotcharts (0 renders on the request thread, None one per core, or none at all
+# in an app preloaded into a pre-forking server, whose workers render in parallel already and share the preloaded
+# seasons, which spawned render processes don't), how many renders can be queued or running at once before new ones
+# get 503 and how many seconds a single render can take
+RENDER_WORKERS = None
+RENDER_QUEUE_SIZE = 4 * (os.cpu_count() or 1)
+RENDER_TIMEOUT = 30
+
+# SQLite file with precomputed results of every player, written by manage.py precompute
+ARTIFACTS_DB = os.path.join(DATA_PATH, "artifacts.sqlite")
+
+# Number of bins across the court which can be requested, the default is the one of create_bins. All of them have
+# to divide FINE_RESOLUTION of the bin pyramid.
+SHOTCHART_RESOLUTIONS = [10, 15, 20, 30, 40, 60, 120]
+DEFAULT_RESOLUTION = 30
+
+# Maximum number of players in a single batch shotchart request
+MAX_BATCH_PLAYERS = 30
+
+# Leaderboards: players with fewer attempts in a zone aren't ranked in it by default, number of players per zone
+# by default and at most
+LEADERBOARD_MIN_ATTEMPTS = 20
+LEADERBOARD_LIMIT = 10
+MAX_LEADERBOARD_LIMIT = 100
+
+# Maximum number of players returned by a single player search, there are around 500 players in a season
+MAX_PLAYERS_LIMIT = 1000
+
+# Directory where cProfile stats of requests with the profile query parameter are dumped, profiling is off if None.
+# If PROFILE_SLOW_SECONDS is set too, every request is profiled and the ones slower than that are dumped.
+PROFILE_DIR = None
+PROFILE_SLOW_SECONDS = None
+
+# Where player headshots are downloaded from, how many decoded headshots are kept in memory, directory where they
+# are stored on disk (None keeps them only in memory) and (connect, read) timeouts of the download in seconds
+HEADSHOT_BASE_URL = "https://ak-static.cms.nba.com/wp-content/uploads/headshots/nba"
+HEADSHOT_CACHE_SIZE = 512
+HEADSHOT_CACHE_DIR = os.path.join(DATA_PATH, "headshots")
+HEADSHOT_TIMEOUT = (3.05, 10)
+
 
 text_location_mapping = {
     ('Right Corner 3', 'Right Side(R)', '24+ ft.'): (-235, 50),
@@ -23,4 +88,8 @@ text_location_mapping = {
     ('Mid-Range', 'Right Side(R)', '8-16 ft.'): (-120, 50),
     ('Mid-Range', 'Left Side(L)', '16-24 ft.'): (190, 50),
     ('Mid-Range', 'Right Side(R)', '16-24 ft.'): (-190, 50),
-}
\ No newline at end of file
+}
+
+# Same positions keyed on the codes of the zone columns
+text_location_codes = {tuple(categories.index(value) for categories, value in zip(ZONE_CATEGORIES.values(), zone)):
+                       location for zone, location in text_location_mapping.items()}
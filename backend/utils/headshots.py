@@ -0,0 +1,146 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import requests
+from PIL import Image, ImageDraw
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.constants import HEADSHOT_BASE_URL, HEADSHOT_CACHE_SIZE, HEADSHOT_CACHE_DIR, HEADSHOT_TIMEOUT
+
+# Width and height of the headshots on the CDN, every headshot is resized to this
+HEADSHOT_SIZE = (260, 190)
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def placeholder():
+    """
+    Gray silhouette on a transparent background, drawn when the headshot of a player can't be downloaded.
+
+    :return: Read-only RGBA numpy array.
+    """
+    width, height = HEADSHOT_SIZE
+    image = Image.new('RGBA', HEADSHOT_SIZE, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    color = (168, 168, 168, 255)
+    draw.ellipse((width * 0.36, height * 0.12, width * 0.64, height * 0.58), fill=color)
+    draw.ellipse((width * 0.2, height * 0.62, width * 0.8, height * 1.3), fill=color)
+    array = np.asarray(image)
+    array.flags.writeable = False
+    return array
+
+
+class HeadshotProvider:
+    """
+    Headshots of players, decoded and resized once and then kept in an in-memory LRU and, if cache_dir is set, on
+    disk as raw arrays. Downloads go through a single session which keeps the connections to the CDN open and
+    retries failed downloads. Headshots which can't be downloaded are replaced by a placeholder.
+    """
+
+    def __init__(self, base_url=HEADSHOT_BASE_URL, cache_dir=HEADSHOT_CACHE_DIR, max_entries=HEADSHOT_CACHE_SIZE,
+                 timeout=HEADSHOT_TIMEOUT):
+        self.base_url = base_url
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._session = None
+        self._lock = threading.Lock()
+
+    def url(self, team_id, season, player_id):
+        return f"{self.base_url.rstrip('/')}/{team_id}/{season}/260x190/{player_id}.png"
+
+    def _get_session(self):
+        with self._lock:
+            if self._session is None:
+                retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504),
+                              allowed_methods=("GET",))
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+                self._session = requests.Session()
+                self._session.mount("http://", adapter)
+                self._session.mount("https://", adapter)
+            return self._session
+
+    def _disk_file(self, team_id, season, player_id):
+        return self.cache_dir / season / str(team_id) / f"{player_id}.npy"
+
+    def _remember(self, key, image):
+        with self._lock:
+            self._entries[key] = image
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def download(self, team_id, season, player_id):
+        """
+        :return: Decoded and resized RGBA numpy array, None if the headshot doesn't exist.
+        :raises requests.RequestException: If the CDN couldn't be reached.
+        """
+        response = self._get_session().get(self.url(team_id, season, player_id), timeout=self.timeout)
+        if response.status_code in (403, 404):
+            return None
+        response.raise_for_status()
+        image = Image.open(BytesIO(response.content)).convert('RGBA')
+        if image.size != HEADSHOT_SIZE:
+            image = image.resize(HEADSHOT_SIZE, Image.LANCZOS)
+        return np.asarray(image)
+
+    def get(self, team_id, season, player_id):
+        """
+        :return: Read-only RGBA numpy array with the headshot, placeholder if it couldn't be downloaded.
+        """
+        key = (int(team_id), season, int(player_id))
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                return image
+
+        disk_file = self._disk_file(*key) if self.cache_dir is not None else None
+        if disk_file is not None and disk_file.exists():
+            image = np.load(disk_file)
+        else:
+            try:
+                image = self.download(*key)
+            except (requests.RequestException, OSError) as error:
+                # Not remembered, next render tries to download it again
+                logger.warning("Couldn't download headshot of player %s: %s", player_id, error)
+                return placeholder()
+            if image is None:
+                # Player has no headshot, placeholder is remembered only in memory in case it gets one later
+                self._remember(key, placeholder())
+                return placeholder()
+            if disk_file is not None:
+                disk_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = disk_file.with_suffix(f".{os.getpid()}.tmp.npy")
+                np.save(tmp_file, image)
+                os.replace(tmp_file, disk_file)
+
+        image.flags.writeable = False
+        self._remember(key, image)
+        return image
+
+    def prefetch(self, season, players, workers=8):
+        """
+        Downloads headshots of the given players into the cache, several at once.
+
+        :param players: Iterable of (team_id, player_id).
+        :return: Number of players whose headshot is cached.
+        """
+        def fetch(player):
+            return self.get(player[0], season, player[1]) is not placeholder()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return sum(executor.map(fetch, players))
+
+
+headshot_provider = HeadshotProvider()
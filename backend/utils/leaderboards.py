@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from utils.league_average import ZONE_COLUMNS
+
+# Columns needed to build the leaderboards
+LEADERBOARD_COLUMNS = ['PLAYER_ID', 'SHOT_ATTEMPTED_FLAG', 'SHOT_MADE_FLAG'] + ZONE_COLUMNS
+
+# Zone columns by which the shots can be grouped, whole zone or just one of its parts
+LEVELS = {
+    'zone': ZONE_COLUMNS,
+    'basic': ['SHOT_ZONE_BASIC'],
+    'area': ['SHOT_ZONE_AREA'],
+    'range': ['SHOT_ZONE_RANGE'],
+}
+
+
+class ZoneLeaderboards:
+    """
+    Makes and attempts of every player in every zone of a season, counted with a single groupby over the season.
+    Within each zone the players are sorted by FG%, so a leaderboard is a filter by attempts and a slice. It is built
+    once per season, the same as the bin pyramid.
+    """
+
+    def __init__(self, shots, players):
+        totals = shots.groupby(by=['PLAYER_ID'] + ZONE_COLUMNS, observed=True).agg(
+            FGA=('SHOT_ATTEMPTED_FLAG', 'sum'), FGM=('SHOT_MADE_FLAG', 'sum')).reset_index()
+        self.names = dict(zip(players.PLAYER_ID.tolist(), players.PLAYER_NAME.astype(str).tolist()))
+        # Coarser levels are summed from the per zone totals, not from the shots
+        self.levels = {level: self._rank(totals, columns) for level, columns in LEVELS.items()}
+
+    @staticmethod
+    def _rank(totals, columns):
+        totals = totals.groupby(by=['PLAYER_ID'] + columns, observed=True).agg(
+            FGA=('FGA', 'sum'), FGM=('FGM', 'sum')).reset_index()
+        player_ids, attempted, made = (totals[column].to_numpy().astype(np.int64)
+                                       for column in ['PLAYER_ID', 'FGA', 'FGM'])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            pct = made / attempted
+        zone_codes, zones = pd.MultiIndex.from_frame(totals[columns]).factorize()
+
+        # Best FG% first, ties go to the player with more attempts
+        order = np.lexsort((player_ids, -attempted, -pct, zone_codes))
+        starts = np.flatnonzero(np.r_[True, zone_codes[order][1:] != zone_codes[order][:-1]])
+        ends = np.r_[starts[1:], len(order)]
+        ranked = {}
+        for start, end in zip(starts, ends):
+            rows = order[start:end]
+            zone = tuple(str(value) for value in zones[zone_codes[rows[0]]])
+            ranked[zone] = (player_ids[rows], made[rows], attempted[rows], pct[rows])
+        return dict(sorted(ranked.items()))
+
+    def leaders(self, level='zone', zones=None, min_attempts=1, limit=10):
+        """
+        :param zones: Names of zone parts, only zones with one of them are returned, e.g. "Left Corner 3" or
+                      "24+ ft.". All zones if None.
+        :param min_attempts: Players with fewer attempts in the zone aren't ranked in it.
+        :return: List of dicts with zone, number of players who qualified and the first limit of them with their
+                 makes, attempts, FG% and percentile rank. Percentile rank is the percentage of qualified players
+                 whose FG% is the same or lower.
+        """
+        min_attempts = max(min_attempts, 1)
+        result = []
+        for zone, (player_ids, made, attempted, pct) in self.levels[level].items():
+            if zones is not None and not set(zone) & set(zones):
+                continue
+            qualified = attempted >= min_attempts
+            player_ids, made, attempted, pct = (player_ids[qualified], made[qualified], attempted[qualified],
+                                                pct[qualified])
+            # Ascending FG% of every qualified player, rank is the number of them which aren't better
+            ascending = pct[::-1]
+            percentiles = np.searchsorted(ascending, pct[:limit], side='right') / max(len(pct), 1) * 100
+            result.append({
+                'zone': list(zone),
+                'qualified': int(len(pct)),
+                'leaders': [{'PLAYER_ID': int(player_id), 'PLAYER_NAME': self.names.get(int(player_id)),
+                             'made': int(player_made), 'attempted': int(player_attempted),
+                             'pct': round(float(player_pct) * 100, 2), 'percentile': round(float(percentile), 1)}
+                            for player_id, player_made, player_attempted, player_pct, percentile
+                            in zip(player_ids, made, attempted, pct, percentiles)],
+            })
+        return result
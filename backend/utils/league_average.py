@@ -0,0 +1,90 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+ZONE_COLUMNS = ['SHOT_ZONE_BASIC', 'SHOT_ZONE_AREA', 'SHOT_ZONE_RANGE']
+# Columns needed to derive league averages from shots
+LEAGUE_AVERAGE_COLUMNS = ZONE_COLUMNS + ['SHOT_ATTEMPTED_FLAG', 'SHOT_MADE_FLAG']
+
+logger = logging.getLogger(__name__)
+
+
+class LeagueAverageTable:
+    """
+    League FG% per zone, stored in an array indexed by zone id with a dict from (SHOT_ZONE_BASIC, SHOT_ZONE_AREA,
+    SHOT_ZONE_RANGE) to the zone id. It is built once per season and shared by all requests.
+
+    Zones which are not in the table get FG% of the zones with the same SHOT_ZONE_BASIC, or the FG% of all zones
+    if there is nothing to go by. Fallbacks are remembered per zone and a warning is logged for the first one.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame.drop_duplicates(subset=ZONE_COLUMNS, keep='first').reset_index(drop=True)
+        self.zone_ids = {tuple(zone): zone_id for zone_id, zone in
+                         enumerate(self.frame.loc[:, ZONE_COLUMNS].itertuples(index=False, name=None))}
+        self.fg_pct = self.frame.FG_PCT.to_numpy(dtype=float)
+
+        # Fallbacks for zones which are missing from the table
+        self.basic_fg_pct = self.frame.groupby('SHOT_ZONE_BASIC', observed=True).FG_PCT.mean().to_dict()
+        self.overall_fg_pct = float(self.frame.FG_PCT.mean()) if len(self.frame) else 0.0
+        self.fallbacks = {}
+
+    @classmethod
+    def from_shots(cls, shots):
+        """
+        Derives league averages from the shots of the whole season, used when there is no league average file.
+        """
+        frame = shots.groupby(by=ZONE_COLUMNS, observed=True).agg(FGA=('SHOT_ATTEMPTED_FLAG', 'sum'),
+                                                   FGM=('SHOT_MADE_FLAG', 'sum')).reset_index()
+        frame['FG_PCT'] = frame.FGM / frame.FGA
+        return cls(frame)
+
+    def add_shots(self, shots):
+        """
+        Adds shots of new games to a table derived with from_shots, only the new shots are grouped.
+
+        :return: New LeagueAverageTable, this one is left as it is.
+        """
+        added = LeagueAverageTable.from_shots(shots).frame
+        frame = pd.concat([self.frame, added]).groupby(by=ZONE_COLUMNS, observed=True, sort=False).agg(
+            FGA=('FGA', 'sum'), FGM=('FGM', 'sum')).reset_index()
+        frame['FG_PCT'] = frame.FGM / frame.FGA
+        return LeagueAverageTable(frame)
+
+    def zone_id(self, zone):
+        """
+        :return: Id of the zone, -1 if zone isn't in the table.
+        """
+        return self.zone_ids.get(tuple(zone), -1)
+
+    def fallback(self, zone):
+        fg_pct = self.fallbacks.get(zone)
+        if fg_pct is None:
+            fg_pct = self.basic_fg_pct.get(zone[0], self.overall_fg_pct)
+            if not self.fallbacks:
+                # Same table is looked up by every request, so it is logged only once
+                logger.warning("League average is missing zone %s, using %.3f instead and FG%% of similar zones for "
+                               "any other missing zone", zone, fg_pct)
+            self.fallbacks[zone] = fg_pct
+        return fg_pct
+
+    def lookup(self, zones):
+        """
+        :param zones: Iterable of (SHOT_ZONE_BASIC, SHOT_ZONE_AREA, SHOT_ZONE_RANGE) tuples.
+        :return: numpy array with league FG% of every zone.
+        """
+        zone_ids = np.array([self.zone_id(zone) for zone in zones], dtype=np.int64)
+        fg_pct = self.fg_pct[np.maximum(zone_ids, 0)] if len(self.fg_pct) else np.zeros(len(zone_ids))
+        for index in np.flatnonzero(zone_ids < 0):
+            fg_pct[index] = self.fallback(tuple(zones[index]))
+        return fg_pct
+
+
+def as_league_table(league_average):
+    """
+    :return: LeagueAverageTable, DataFrames with league averages are converted to one.
+    """
+    if league_average is None or isinstance(league_average, LeagueAverageTable):
+        return league_average
+    return LeagueAverageTable(league_average)
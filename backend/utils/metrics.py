@@ -0,0 +1,239 @@
+import bisect
+import contextvars
+import cProfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from flask import g, request
+
+from utils.constants import PROFILE_DIR, PROFILE_SLOW_SECONDS
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Name, type and help of every metric which is exported
+METRICS = {
+    'bballytics_request_duration_seconds': ('histogram', "Duration of requests."),
+    'bballytics_stage_duration_seconds': ('histogram', "Duration of single stages of requests."),
+    'bballytics_cache_requests_total': ('counter', "Lookups of cached results by cache and result."),
+    'bballytics_season_bytes': ('gauge', "Memory taken by the shots of a loaded season."),
+}
+
+# (stage, seconds) of the request which is being handled, None when nobody is collecting them
+_stages = contextvars.ContextVar('stages', default=None)
+# Held while a request is profiled
+_profile_lock = threading.Lock()
+
+
+@contextmanager
+def timed(stage):
+    """
+    Measures how long the block took and records it as a stage of the current request. Outside of a request (or
+    a render job started by one) nothing is recorded.
+    """
+    stages = _stages.get()
+    if stages is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages.append((stage, time.perf_counter() - start))
+
+
+def collect_stages(function, *args):
+    """
+    Runs the function and collects the stages it records, used to bring timings back from the render workers.
+
+    :return: Tuple of the result and list of (stage, seconds).
+    """
+    stages = []
+    token = _stages.set(stages)
+    try:
+        return function(*args), stages
+    finally:
+        _stages.reset(token)
+
+
+def add_stages(stages):
+    """
+    Adds stages measured somewhere else (e.g. in a render worker) to the current request.
+    """
+    current = _stages.get()
+    if current is not None:
+        current.extend(stages)
+
+
+class Histogram:
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        # Last count is for values over the largest bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(labels, **extra):
+    labels = dict(labels, **extra)
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+
+class Metrics:
+    """
+    Latency histograms and counters of this process, exported in the Prometheus text format. Every worker process
+    of the server has its own metrics.
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        # Gauges are kept with the counters, they differ only in being set instead of incremented
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def increment(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = value
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self):
+        """
+        :return: All metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            histograms = sorted((key, (list(h.counts), h.sum, h.count, h.buckets))
+                                for key, h in self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        lines = []
+        for name, (kind, description) in METRICS.items():
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+            for (metric, labels), value in counters:
+                if metric == name:
+                    lines.append(f"{name}{_labels(dict(labels))} {value}")
+            for (metric, labels), (counts, total, count, buckets) in histograms:
+                if metric != name:
+                    continue
+                labels = dict(labels)
+                cumulative = 0
+                for bound, bucket_count in zip(buckets + ('+Inf',), counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{_labels(labels, le=bound)} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {total}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def server_timing(stages):
+    """
+    Sums durations of stages with the same name, e.g. one plot stage per chart of a batch.
+
+    :return: Value of the Server-Timing header, durations are in milliseconds.
+    """
+    totals = {}
+    for stage, seconds in stages:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in totals.items()), totals
+
+
+def _stop_profiler(profiler):
+    profiler.disable()
+    _profile_lock.release()
+
+
+def init_app(app, profile_dir=PROFILE_DIR, slow_seconds=PROFILE_SLOW_SECONDS):
+    """
+    Times every request of the app. Stage timings are sent back in the Server-Timing header and, together with
+    the total duration, added to the latency histograms.
+
+    If profile_dir is set, requests with the profile query parameter are run under cProfile and the stats are
+    dumped into that directory. With slow_seconds set as well, every request is profiled and the ones which took
+    longer than that are dumped, profiling makes all requests slower so it is meant only for hunting slow requests.
+    Only one request is profiled at a time, concurrent ones are served without profiling.
+    """
+
+    @app.before_request
+    def start_timing():
+        g.metrics_start = time.perf_counter()
+        g.metrics_token = _stages.set([])
+        # Only one profiler can be active in the process, requests which come while another one is profiled
+        # just aren't profiled
+        if profile_dir and (slow_seconds is not None or 'profile' in request.args) and \
+                _profile_lock.acquire(blocking=False):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiling tool than ours is active
+                _profile_lock.release()
+            else:
+                g.profiler = profiler
+
+    @app.after_request
+    def record_timing(response):
+        if 'metrics_start' not in g:
+            return response
+        duration = time.perf_counter() - g.metrics_start
+        header, totals = server_timing((_stages.get() or []) + [('total', duration)])
+        response.headers['Server-Timing'] = header
+        # Browsers show timings of cross origin responses only if they are allowed to
+        response.headers['Timing-Allow-Origin'] = "*"
+
+        endpoint = request.endpoint or "unknown"
+        metrics.observe('bballytics_request_duration_seconds', duration, endpoint=endpoint, method=request.method,
+                        status=response.status_code)
+        for stage, seconds in totals.items():
+            if stage != 'total':
+                metrics.observe('bballytics_stage_duration_seconds', seconds, endpoint=endpoint, stage=stage)
+
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            _stop_profiler(profiler)
+            if 'profile' in request.args or duration >= slow_seconds:
+                Path(profile_dir).mkdir(parents=True, exist_ok=True)
+                timestamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+                profiler.dump_stats(Path(profile_dir) / f"{timestamp}-{endpoint}-{duration * 1000:.0f}ms.prof")
+        return response
+
+    @app.teardown_request
+    def stop_timing(error=None):
+        # Request failed before its profile was dumped
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            _stop_profiler(profiler)
+        token = g.pop('metrics_token', None)
+        if token is not None:
+            _stages.reset(token)
+
+
+metrics = Metrics()
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from importlib.metadata import version as package_version
+from pathlib import Path
+
+from flask import make_response, request
+
+from utils.constants import RENDER_CACHE_SIZE, RENDER_CACHE_DIR, RENDER_CACHE_DISK_BYTES
+from utils.metrics import metrics
+
+# Modules whose code decides what the cached charts and data look like
+RENDERER_FILES = ['shotchart_tools.py', 'shotchart_data.py', 'bin_pyramid.py', 'zones.py', 'league_average.py',
+                  'headshots.py']
+
+
+@lru_cache(maxsize=None)
+def renderer_version():
+    """
+    :return: Hash of the rendering code and of the matplotlib version, so whatever an older version of them
+             rendered isn't served from the caches or matched by an ETag.
+    """
+    digest = hashlib.sha1(package_version('matplotlib').encode('utf-8'))
+    for name in RENDERER_FILES:
+        digest.update((Path(__file__).parent / name).read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def version_tag(version):
+    return "-".join(str(part) for part in tuple(version) + (renderer_version(),))
+
+
+class RenderCache:
+    """
+    LRU cache of rendered shotcharts. The most recently used entries are kept in memory and, if disk_path is set,
+    every entry is also written to disk so it survives restarts and can be shared between workers. Entries are
+    grouped by season and version of the season data, so when the season file changes all entries rendered from
+    the old data are dropped. Disk tier is kept under max_disk_bytes by removing the files which were used the
+    longest time ago, disk hits touch their file.
+    """
+
+    def __init__(self, max_entries=RENDER_CACHE_SIZE, disk_path=RENDER_CACHE_DIR,
+                 max_disk_bytes=RENDER_CACHE_DISK_BYTES):
+        self.max_entries = max_entries
+        self.disk_path = Path(disk_path) if disk_path else None
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        # Bytes on disk as of the last trim plus what was written since, None until the directory is first scanned
+        self._disk_bytes = None
+        self._trim_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(season, player_id, version, options):
+        """
+        :return: Hex digest which identifies the rendered image, it is also used as the ETag.
+        """
+        key = repr((season, player_id, tuple(version), sorted(options.items()), renderer_version()))
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def _disk_file(self, season, version, key):
+        return self.disk_path / season / version_tag(version) / f"{key}.cache"
+
+    def _check_version(self, season, version):
+        # Called with the lock held, drops everything rendered from an older version of the season
+        if self._versions.get(season) == version:
+            return
+        self._versions[season] = version
+        for entry_key in [entry_key for entry_key in self._entries if entry_key[0] == season]:
+            del self._entries[entry_key]
+        if self.disk_path is not None and (self.disk_path / season).exists():
+            for old_dir in (self.disk_path / season).iterdir():
+                if old_dir.name != version_tag(version):
+                    shutil.rmtree(old_dir, ignore_errors=True)
+
+    def get(self, season, version, key):
+        """
+        :return: Cached bytes or None if the entry isn't cached.
+        """
+        with self._lock:
+            self._check_version(season, version)
+            data = self._entries.get((season, key))
+            if data is not None:
+                self._entries.move_to_end((season, key))
+                metrics.increment('bballytics_cache_requests_total', cache='render', result='hit')
+                return data
+
+        if self.disk_path is not None:
+            disk_file = self._disk_file(season, version, key)
+            try:
+                data = disk_file.read_bytes()
+                os.utime(disk_file)
+            except FileNotFoundError:
+                # Not cached or removed by a trim in this or another worker
+                data = None
+            if data is not None:
+                self._remember(season, key, data)
+                metrics.increment('bballytics_cache_requests_total', cache='render', result='disk_hit')
+                return data
+        metrics.increment('bballytics_cache_requests_total', cache='render', result='miss')
+        return None
+
+    def put(self, season, version, key, data):
+        with self._lock:
+            self._check_version(season, version)
+        self._remember(season, key, data)
+
+        if self.disk_path is not None:
+            disk_file = self._disk_file(season, version, key)
+            disk_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = disk_file.with_suffix(f".{os.getpid()}.tmp")
+            tmp_file.write_bytes(data)
+            os.replace(tmp_file, disk_file)
+            if self._disk_bytes is not None:
+                self._disk_bytes += len(data)
+            if self._disk_bytes is None or self._disk_bytes > self.max_disk_bytes:
+                self._trim_disk()
+
+    def _trim_disk(self):
+        """
+        Removes the least recently used files until the disk tier takes at most 90% of max_disk_bytes. Workers which
+        share the directory trim it the same way, so files can disappear while it is scanned.
+        """
+        # Only one thread scans the directory, the others keep writing and will trim next time if needed
+        if not self._trim_lock.acquire(blocking=False):
+            return
+        try:
+            files = []
+            for path in self.disk_path.rglob('*.cache'):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime_ns, stat.st_size, path))
+            total = sum(size for _, size, _ in files)
+            if total > self.max_disk_bytes:
+                for _, size, path in sorted(files):
+                    if total <= self.max_disk_bytes * 0.9:
+                        break
+                    path.unlink(missing_ok=True)
+                    total -= size
+            self._disk_bytes = total
+        finally:
+            self._trim_lock.release()
+
+    def _remember(self, season, key, data):
+        with self._lock:
+            self._entries[(season, key)] = data
+            self._entries.move_to_end((season, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+def not_modified(etag):
+    """
+    :return: True if the client already has the image with the given ETag.
+    """
+    matched = request.if_none_match.contains(etag)
+    metrics.increment('bballytics_cache_requests_total', cache='etag', result='hit' if matched else 'miss')
+    return matched
+
+
+def conditional_response(data, etag, last_modified, content_type="image/png"):
+    """
+    Creates response with caching headers. Returns 304 without the body if client already has this version.
+    """
+    response = make_response(data if data is not None else b"")
+    response.headers["Content-Type"] = content_type
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Client should always check with us if the image is still valid, ETag makes that check cheap
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def json_response(payload, etag, last_modified):
+    """
+    Compact JSON response with the same caching headers as conditional_response, payload can be None when client
+    already has it.
+    """
+    if payload is None:
+        return conditional_response(None, etag, last_modified, "application/json")
+    data = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return conditional_response(data, etag, last_modified, "application/json; charset=utf-8")
+
+
+render_cache = RenderCache()
@@ -0,0 +1,186 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from utils.bin_pyramid import BinPyramid
+from utils.constants import RENDER_WORKERS, RENDER_QUEUE_SIZE, RENDER_TIMEOUT
+from utils.metrics import add_stages, collect_stages, timed
+from utils.season_store import season_store
+
+
+class RenderPoolBusy(Exception):
+    """
+    Raised when the render queue is full or the render didn't finish in time.
+    """
+
+
+def render_player_png(season, player_id, title, render_options, filters=None):
+    """
+    Bins the shots of a player (only the ones which pass the filters) and renders the shotchart, runs inside a
+    worker process.
+
+    :return: Bytes of the PNG image.
+    """
+    from utils.shotchart_tools import create_bins, render_shotchart_png
+
+    render_options = dict(render_options)
+    resolution = render_options.pop('resolution', None)
+    target_player_df = season_store.player_shots(season, player_id, filters)
+    league_average = season_store.league_average(season)
+    with timed('bins'):
+        if resolution is None:
+            binned_df = create_bins(data_frame=target_player_df, league_average=league_average)
+        elif filters:
+            # Pyramid of the season has all shots of the player, so the filtered shots get their own
+            binned_df = BinPyramid(target_player_df).bins(player_id, resolution, render_options.get('shape', 'square'),
+                                                          league_average)
+        else:
+            # Other resolutions are summed up from the pyramid instead of binning the shots again
+            binned_df = season_store.get(season).bin_pyramid().bins(
+                player_id, resolution, render_options.get('shape', 'square'), league_average)
+    return render_shotchart_png(original_df=target_player_df, data_frame=binned_df, title=title, **render_options)
+
+
+def render_players_pngs(season, player_ids, titles, render_options, team_id=None):
+    """
+    Renders shotcharts of many players, shots of all of them are binned in a single pass. If team_id is given only
+    shots taken for that team are used. Runs inside a worker process.
+
+    :return: List of PNG bytes in the same order as player_ids.
+    """
+    from utils.shotchart_tools import create_bins, render_shotchart_png
+
+    season_data = season_store.get(season)
+    shots = pd.concat([season_data.player_shots(player_id) for player_id in player_ids], ignore_index=True)
+    if team_id is not None:
+        shots = shots.loc[shots.TEAM_ID == team_id].reset_index(drop=True)
+    league_average = season_store.league_average(season)
+    with timed('bins'):
+        binned_df = create_bins(data_frame=shots, league_average=league_average, group_by='PLAYER_ID')
+
+    rows = binned_df.groupby('PLAYER_ID').indices
+    pngs = []
+    for player_id, title in zip(player_ids, titles):
+        player_rows = rows[player_id]
+        pngs.append(render_shotchart_png(original_df=shots.iloc[player_rows], data_frame=binned_df.iloc[player_rows],
+                                         title=title, **render_options))
+    return pngs
+
+
+def _warm_worker(shots_path, league_avg_path, headshot_url, headshot_dir):
+    # Worker uses the same data directories as the parent, and loads everything expensive before the first job
+    from utils.headshots import headshot_provider
+    from utils.shotchart_tools import get_shotchart_background
+
+    season_store.shots_path = shots_path
+    season_store.league_avg_path = league_avg_path
+    headshot_provider.base_url = headshot_url
+    headshot_provider.cache_dir = headshot_dir
+    get_shotchart_background()
+    try:
+        # Only the latest season, which gets most of the requests, other seasons are loaded when they are needed so
+        # every worker doesn't hold all of them
+        seasons = sorted(season_store.seasons())
+        if seasons:
+            season_store.get(seasons[-1])
+            season_store.league_average(seasons[-1])
+    except (OSError, LookupError):
+        # Missing data is reported when a request for it comes in, not when the worker starts
+        pass
+
+
+class RenderPool:
+    """
+    Pool of worker processes which render shotcharts, so rendering doesn't run on the request threads and scales
+    over all cores. At most queue_size renders can be waiting or running at once, anything over that is rejected
+    right away instead of piling up. With zero workers rendering happens on the calling thread, None starts one
+    worker per core.
+    """
+
+    def __init__(self, workers=RENDER_WORKERS, queue_size=RENDER_QUEUE_SIZE, timeout=RENDER_TIMEOUT):
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        from utils.headshots import headshot_provider
+
+        with self._lock:
+            if self._executor is None:
+                # Forking a process with running threads is not safe, so workers are spawned
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'),
+                                                     initializer=_warm_worker,
+                                                     initargs=(season_store.shots_path, season_store.league_avg_path,
+                                                               headshot_provider.base_url,
+                                                               headshot_provider.cache_dir))
+            return self._executor
+
+    def _reset_executor(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def render(self, season, player_id, title, render_options, filters=None):
+        """
+        :return: Bytes of the PNG image.
+        :raises RenderPoolBusy: If there is no free slot in the queue or the render timed out.
+        """
+        return self._run(render_player_png, season, player_id, title, render_options, filters)
+
+    def render_batch(self, season, player_ids, titles, render_options, team_id=None):
+        """
+        Renders shotcharts of many players as a single job, so it takes only one slot in the queue.
+
+        :return: List of PNG bytes in the same order as player_ids.
+        :raises RenderPoolBusy: If there is no free slot in the queue or the render timed out.
+        """
+        return self._run(render_players_pngs, season, player_ids, titles, render_options, team_id)
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            raise RenderPoolBusy("Too many shotcharts are being rendered, try again later")
+
+        release = True
+        try:
+            with timed('render'):
+                if not self.workers:
+                    result, stages = collect_stages(function, *args)
+                else:
+                    executor = self._get_executor()
+                    try:
+                        future = executor.submit(collect_stages, function, *args)
+                        result, stages = future.result(timeout=self.timeout)
+                    except TimeoutError:
+                        if not future.cancel():
+                            # Render is still running in a worker, it keeps its slot until it finishes, so renders
+                            # which are stuck still count against the queue
+                            release = False
+                            future.add_done_callback(lambda _: self._slots.release())
+                        raise RenderPoolBusy(f"Rendering didn't finish in {self.timeout} seconds")
+                    except BrokenProcessPool:
+                        # One of the workers died, next render will start a fresh pool
+                        self._reset_executor(executor)
+                        raise RenderPoolBusy("Render workers were restarted, try again")
+            # Stages which ran in the worker are reported as a part of the request
+            add_stages(stages)
+            return result
+        finally:
+            if release:
+                self._slots.release()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+render_pool = RenderPool()
@@ -0,0 +1,65 @@
+import bisect
+import unicodedata
+
+
+def fold(text):
+    """
+    :return: Lowercase text without accents, so that "jokic" finds "Nikola Jokić".
+    """
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+class RosterIndex:
+    """
+    Players of one season sorted by name, with a sorted list of every word of every name for prefix search.
+    It is built once per season and rebuilt only when the season data changes.
+    """
+
+    def __init__(self, players_df):
+        self.player_ids = [int(player_id) for player_id in players_df.PLAYER_ID]
+        self.names = [str(name) for name in players_df.PLAYER_NAME]
+        self.folded = [fold(name) for name in self.names]
+        self.positions = {player_id: position for position, player_id in enumerate(self.player_ids)}
+        # (word, position of player) for every word of every name, e.g. both "lebron" and "james"
+        self.words = sorted((word, position) for position, name in enumerate(self.folded) for word in name.split())
+
+    def __len__(self):
+        return len(self.player_ids)
+
+    def name(self, player_id):
+        """
+        :return: Name of the player, None if player isn't in this season.
+        """
+        position = self.positions.get(player_id)
+        return self.names[position] if position is not None else None
+
+    def _prefix_matches(self, query):
+        positions = set()
+        start = bisect.bisect_left(self.words, (query,))
+        for word, position in self.words[start:]:
+            if not word.startswith(query):
+                break
+            positions.add(position)
+        return positions
+
+    def search(self, query=None, limit=None):
+        """
+        Finds players whose name contains the query. Players with a word in the name starting with the query (or
+        with the whole name starting with it) come first, then the ones which contain it anywhere. Both groups
+        are sorted by name.
+
+        :return: List of (PLAYER_ID, PLAYER_NAME) tuples.
+        """
+        query = fold(query or "").strip()
+        if not query:
+            positions = list(range(len(self)))
+        else:
+            first_word = query.split()[0]
+            prefix = {position for position in self._prefix_matches(first_word) if query in self.folded[position]}
+            prefix |= {position for position, name in enumerate(self.folded) if name.startswith(query)}
+            rest = [position for position, name in enumerate(self.folded) if query in name and position not in prefix]
+            positions = sorted(prefix) + rest
+        if limit is not None:
+            positions = positions[:limit]
+        return [(self.player_ids[position], self.names[position]) for position in positions]
@@ -0,0 +1,461 @@
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.bin_pyramid import PYRAMID_COLUMNS, BinPyramid
+from utils.compact import concat_shots, memory_usage, read_shots
+from utils.columnar import (COLUMNAR_SUFFIX, FORMAT_VERSION, META_FILE, columnar_path, decode_rows, read_columns,
+                            read_meta)
+from utils.constants import SHOTS_PATH, LEAGUE_AVG_PATH, LEAGUE_AVG_FROM_SHOTS
+from utils.leaderboards import LEADERBOARD_COLUMNS, ZoneLeaderboards
+from utils.league_average import LEAGUE_AVERAGE_COLUMNS, LeagueAverageTable
+from utils.metrics import timed
+from utils.roster import RosterIndex
+from utils.shot_index import INDEX_COLUMNS, ShotIndex
+
+# Suffix of the directory with shots appended during the season, e.g. shots/2019-20.deltas/000001.csv
+DELTAS_SUFFIX = '.deltas'
+
+
+def file_version(path):
+    """
+    Version of the file on disk, used to find out when cached data has gone stale.
+
+    :return: Tuple of modification time (ns) and size of the file.
+    """
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class SeasonNotFound(LookupError):
+    """
+    Raised when there is neither a CSV nor a columnar copy of the requested season.
+    """
+
+
+class SeasonData:
+    """
+    Shots of a single season, sorted by PLAYER_ID so that all shots of one player are stored in a contiguous
+    block of rows. The offsets of each block are kept in a dict, so fetching the shots of one player is a slice
+    instead of a scan over the whole season.
+    """
+
+    def __init__(self, shots, version):
+        # Stable sort keeps the original order of the shots within each player
+        self.shots = shots.sort_values(by='PLAYER_ID', kind='stable').reset_index(drop=True)
+        self.version = version
+        # Number of the last delta merged into the season and the last delta with shots of every player
+        self.deltas = 0
+        self.player_deltas = {}
+        self.modified_ns = version[1]
+
+        player_ids, starts = np.unique(self.shots.PLAYER_ID.to_numpy(), return_index=True)
+        ends = np.r_[starts[1:], len(self.shots)]
+        self.player_offsets = {int(player_id): (int(start), int(end))
+                               for player_id, start, end in zip(player_ids, starts, ends)}
+        self._players = None
+        self._roster = None
+        self._bin_pyramid = None
+        self._shot_index = None
+        self._leaderboards = None
+
+    @property
+    def last_modified(self):
+        """
+        :return: Modification time of the file this season was loaded from, or of its last delta.
+        """
+        return datetime.fromtimestamp(self.modified_ns / 1e9, tz=timezone.utc)
+
+    def append(self, deltas, modified_ns):
+        """
+        Merges shots of new games into the season. Shots of every player stay in one block, new shots go after the
+        shots the player already had.
+
+        :param deltas: List of (number of the delta, DataFrame with its shots), ordered by the number.
+        :param modified_ns: Modification time of the last delta.
+        :return: New SeasonData, this one is left as it is for requests which are still using it.
+        """
+        new_shots = [delta_shots.reindex(columns=self.shots.columns) for _, delta_shots in deltas]
+        shots = concat_shots([self.shots] + new_shots)
+        season_data = SeasonData(shots, self.version)
+        season_data.deltas = deltas[-1][0]
+        season_data.player_deltas = dict(self.player_deltas)
+        for delta, delta_shots in deltas:
+            season_data.player_deltas.update((int(player_id), delta) for player_id in delta_shots.PLAYER_ID.unique())
+        season_data.modified_ns = max(self.modified_ns, modified_ns)
+        return season_data
+
+    def player_shots(self, player_id, filters=None):
+        """
+        :param filters: Optional dict of filters, arguments of ShotIndex.rows.
+        :return: DataFrame with shots of the given player, empty if player has no shots in this season.
+        """
+        start, end = self.player_offsets.get(player_id, (0, 0))
+        if filters:
+            return self.shots.iloc[self.shot_index().rows(start, end, **filters)]
+        return self.shots.iloc[start:end]
+
+    def memory_usage(self):
+        """
+        :return: Bytes of memory taken by the shots of this season.
+        """
+        return memory_usage(self.shots)
+
+    def shot_columns(self, columns):
+        """
+        :return: DataFrame with (at least) the given columns of every shot of the season.
+        """
+        return self.shots
+
+    def team_players(self, team_id):
+        """
+        :return: IDs of players who took shots for the team, ordered by PLAYER_ID.
+        """
+        shots = self.shot_columns(['PLAYER_ID', 'TEAM_ID'])
+        return [int(player_id) for player_id in shots.PLAYER_ID[shots.TEAM_ID == team_id].unique()]
+
+    def players(self):
+        """
+        :return: DataFrame with unique PLAYER_ID and PLAYER_NAME pairs, sorted by name.
+        """
+        if self._players is None:
+            unique_df = self.shots.drop_duplicates(subset="PLAYER_ID")
+            self._players = unique_df.loc[:, ["PLAYER_ID", "PLAYER_NAME"]].sort_values(by='PLAYER_NAME',
+                                                                                     ascending=True)
+        return self._players
+
+    def roster(self):
+        """
+        :return: RosterIndex of players in this season, used for searching players by name.
+        """
+        if self._roster is None:
+            self._roster = RosterIndex(self.players())
+        return self._roster
+
+    def player_name(self, player_id):
+        """
+        :return: Full name of the player from nba_api, or the name from the shots if nba_api doesn't know the player
+                 (e.g. rookies which were added after the nba_api release).
+        """
+        # nba_api loads its list of all players on import, so it is imported only when it is needed
+        from nba_api.stats.static.players import find_player_by_id
+
+        player = find_player_by_id(player_id=player_id)
+        if player is not None:
+            return player["full_name"]
+        return self.roster().name(player_id) or str(player_id)
+
+    def bin_pyramid(self):
+        """
+        :return: BinPyramid of this season, used for binning shots at resolutions other than the default one.
+        """
+        if self._bin_pyramid is None:
+            with timed('pyramid'):
+                self._bin_pyramid = self._build_bin_pyramid()
+        return self._bin_pyramid
+
+    def _build_bin_pyramid(self):
+        return BinPyramid(self.shots)
+
+    def shot_index(self):
+        """
+        :return: ShotIndex of this season, used for filtering shots by game, date, period and opponent.
+        :raises ValueError: If the season doesn't have the columns needed for filtering.
+        """
+        if self._shot_index is None:
+            with timed('index'):
+                self._shot_index = self._build_shot_index()
+        return self._shot_index
+
+    def _build_shot_index(self):
+        return ShotIndex(self.shots)
+
+    def leaderboards(self):
+        """
+        :return: ZoneLeaderboards of this season, makes and attempts of every player in every zone.
+        """
+        if self._leaderboards is None:
+            with timed('leaderboards'):
+                self._leaderboards = self._build_leaderboards()
+        return self._leaderboards
+
+    def _build_leaderboards(self):
+        return ZoneLeaderboards(self.shots, self.players())
+
+
+class ColumnarSeasonData(SeasonData):
+    """
+    Season read from the columnar format written by the ingest command. Columns are memory-mapped, so only the
+    pages which are actually touched are read and they are shared between all processes through the page cache.
+    """
+
+    def __init__(self, path, version):
+        self.version = version
+        self.columns, offsets = read_columns(path, read_meta(path))
+        self.player_offsets = {int(player_id): (int(start), int(end)) for player_id, start, end in offsets}
+        self.deltas = 0
+        self.player_deltas = {}
+        self.modified_ns = version[1]
+        self._shots = None
+        self._players = None
+        self._roster = None
+        self._bin_pyramid = None
+        self._shot_index = None
+        self._leaderboards = None
+
+    @property
+    def shots(self):
+        # Whole season is decoded only when somebody needs all of it
+        if self._shots is None:
+            self._shots = decode_rows(self.columns)
+        return self._shots
+
+    def player_shots(self, player_id, filters=None):
+        start, end = self.player_offsets.get(player_id, (0, 0))
+        if filters:
+            return decode_rows(self.columns, rows=self.shot_index().rows(start, end, **filters))
+        return decode_rows(self.columns, start, end)
+
+    def shot_columns(self, columns):
+        # Only the given columns are decoded, the whole season would be copied out of the shared pages
+        return decode_rows({column: self.columns[column] for column in columns})
+
+    def _build_bin_pyramid(self):
+        # Full rows are decoded only for the bins which are returned
+        return BinPyramid(self.shot_columns(PYRAMID_COLUMNS),
+                          rows=lambda positions: decode_rows(self.columns, rows=positions).set_axis(positions))
+
+    def _build_shot_index(self):
+        # Only the indexed columns are decoded, not the whole season
+        return ShotIndex(decode_rows({column: self.columns[column] for column in INDEX_COLUMNS
+                                      if column in self.columns}))
+
+    def _build_leaderboards(self):
+        return ZoneLeaderboards(decode_rows({column: self.columns[column] for column in LEADERBOARD_COLUMNS}),
+                                self.players())
+
+    def memory_usage(self):
+        # Mapped columns are counted whole even though only the touched pages are in memory, and they are shared
+        mapped = sum(values.nbytes for values, _ in self.columns.values())
+        return mapped + (memory_usage(self._shots) if self._shots is not None else 0)
+
+    def players(self):
+        if self._players is None:
+            starts = [start for start, _ in self.player_offsets.values()]
+            codes, dtype = self.columns['PLAYER_NAME']
+            names = [dtype.categories[codes[start]] for start in starts]
+            unique_df = pd.DataFrame({'PLAYER_ID': list(self.player_offsets), 'PLAYER_NAME': names})
+            self._players = unique_df.sort_values(by='PLAYER_NAME', ascending=True)
+        return self._players
+
+
+class SeasonStore:
+    """
+    Process wide store of season shots and league averages. Every file is parsed once and kept in memory until
+    its modification time or size changes on disk.
+    """
+
+    def __init__(self, shots_path=SHOTS_PATH, league_avg_path=LEAGUE_AVG_PATH):
+        self.shots_path = shots_path
+        self.league_avg_path = league_avg_path
+        self._seasons = {}
+        self._league_averages = {}
+        self._columnar_meta = {}
+        self._delta_files = {}
+        self._lock = threading.Lock()
+
+    def season_path(self, season):
+        return (Path(self.shots_path) / season).with_suffix('.csv')
+
+    def league_average_path(self, season):
+        return (Path(self.league_avg_path) / season).with_suffix('.csv')
+
+    def deltas_path(self, season):
+        return Path(self.shots_path) / (season + DELTAS_SUFFIX)
+
+    def seasons(self):
+        """
+        :return: Names of all seasons which have either a CSV or a columnar copy in the shots directory.
+        """
+        seasons = []
+        for path in os.listdir(self.shots_path):
+            if ".csv" in path or path.endswith(COLUMNAR_SUFFIX):
+                season = path.split(".")[0]
+                if season not in seasons:
+                    seasons.append(season)
+        return seasons
+
+    def source(self, season):
+        """
+        Finds out from which file the season should be read. Columnar copy is preferred, unless the CSV it was
+        created from has changed since the ingestion.
+
+        :return: Tuple of loader and version of the source.
+        :raises SeasonNotFound: If the season has no shots file.
+        """
+        csv_path = self.season_path(season)
+        columns_path = columnar_path(self.shots_path, season)
+        if (columns_path / META_FILE).exists():
+            meta_version = file_version(columns_path / META_FILE)
+            cached = self._columnar_meta.get(season)
+            if cached is None or cached[0] != meta_version:
+                meta = read_meta(columns_path)
+                cached = (meta_version, meta['source_version'], meta.get('format'))
+                self._columnar_meta[season] = cached
+            _, source_version, format_version = cached
+            # Copies written by an older version of ingest are read only if there is no CSV to read instead
+            if not csv_path.exists() or (format_version == FORMAT_VERSION
+                                         and tuple(source_version or ()) == file_version(csv_path)):
+                return (lambda version: ColumnarSeasonData(columns_path, version)), ('columnar',) + meta_version
+        if not csv_path.exists():
+            raise SeasonNotFound(f"Season {season} doesn't exist")
+        return (lambda version: SeasonData(read_shots(csv_path), version)), ('csv',) + file_version(csv_path)
+
+    def delta_files(self, season):
+        """
+        Deltas are CSVs with shots of new games, named by their number, which are merged into the season when it
+        is read. The directory is listed again only when its modification time changes.
+
+        :return: List of (number, path) of all deltas of the season, ordered by the number.
+        """
+        path = self.deltas_path(season)
+        try:
+            modified_ns = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        cached = self._delta_files.get(season)
+        if cached is None or cached[0] != modified_ns:
+            files = sorted((int(name[:-4]), path / name) for name in os.listdir(path)
+                           if name.endswith('.csv') and name[:-4].isdigit())
+            cached = (modified_ns, files)
+            self._delta_files[season] = cached
+        return cached[1]
+
+    def add_delta(self, season, shots):
+        """
+        Stores shots of new games as the next delta of the season, every process picks it up on its next read.
+
+        :return: Number of the delta.
+        """
+        path = self.deltas_path(season)
+        path.mkdir(parents=True, exist_ok=True)
+        files = self.delta_files(season)
+        delta = files[-1][0] + 1 if files else 1
+        # Written under a name which isn't read as a delta and then renamed, so nobody reads half of the file
+        tmp_file = path / f".{delta:06d}.{os.getpid()}.tmp"
+        shots.to_csv(tmp_file, index=False)
+        os.replace(tmp_file, path / f"{delta:06d}.csv")
+        return delta
+
+    def get(self, season):
+        """
+        :return: SeasonData for the given season, loaded from disk only if it isn't cached or the file changed.
+                 Deltas which were added since it was loaded are merged into it.
+        :raises SeasonNotFound: If the season has no shots file.
+        """
+        load, version = self.source(season)
+        deltas = self.delta_files(season)
+        last_delta = deltas[-1][0] if deltas else 0
+        cached = self._seasons.get(season)
+        if cached is not None and cached.version == version and cached.deltas == last_delta:
+            return cached
+
+        with self._lock:
+            # Some other thread could have loaded it while we were waiting for the lock
+            cached = self._seasons.get(season)
+            # Deltas which were removed (e.g. folded into the season file) can't be taken out, season is reloaded
+            if cached is None or cached.version != version or cached.deltas > last_delta:
+                with timed('load'):
+                    cached = load(version)
+            new_deltas = [(delta, path) for delta, path in deltas if delta > cached.deltas]
+            if new_deltas:
+                with timed('deltas'):
+                    cached = self._merge_deltas(season, cached, new_deltas)
+            self._seasons[season] = cached
+            return cached
+
+    def _merge_deltas(self, season, season_data, deltas):
+        # Called with the lock held
+        frames = [(delta, read_shots(path)) for delta, path in deltas]
+        merged = season_data.append(frames, max(file_version(path)[0] for _, path in deltas))
+        # League averages derived from shots are updated with the new shots instead of being derived again
+        league_average = self._league_averages.get(season)
+        if league_average is not None and league_average[2] == season_data.deltas:
+            table = league_average[1].add_shots(pd.concat([shots for _, shots in frames], ignore_index=True))
+            self._league_averages[season] = (league_average[0], table, merged.deltas)
+        return merged
+
+    def player_shots(self, season, player_id, filters=None):
+        return self.get(season).player_shots(player_id, filters)
+
+    def memory_usage(self):
+        """
+        :return: Dict of season -> bytes of memory taken by its shots, for every season loaded in this process.
+        """
+        return {season: season_data.memory_usage() for season, season_data in list(self._seasons.items())}
+
+    def player_seasons(self, player_id):
+        """
+        :return: List of (season, PLAYER_NAME) for every season in which the player has shots.
+        """
+        seasons = []
+        for season in sorted(self.seasons()):
+            season_data = self.get(season)
+            if player_id in season_data.player_offsets:
+                seasons.append((season, season_data.roster().name(player_id)))
+        return seasons
+
+    def version(self, season):
+        """
+        :return: Combined version of the season shots and its league averages, anything computed from a season
+                 is stale once this changes.
+        """
+        return tuple(self.get(season).version) + self._league_average_source(season)[1]
+
+    def player_version(self, season, player_id):
+        """
+        :return: Version of anything computed from shots of one player. It changes together with the version of the
+                 season and also when a delta with new shots of the player is merged, deltas without shots of the
+                 player leave it as it was.
+        """
+        return self.version(season) + (self.get(season).player_deltas.get(player_id, 0),)
+
+    def _league_average_source(self, season):
+        """
+        :return: Tuple of loader and version of the league averages, which are read from the league average file or
+                 computed from the season shots if the file doesn't exist.
+        """
+        path = self.league_average_path(season)
+        if path.exists() or not LEAGUE_AVG_FROM_SHOTS:
+            return (lambda season_data: LeagueAverageTable(pd.read_csv(path))), file_version(path)
+        # Derived table changes only with the season, which is already a part of the version
+        # Only the columns which are needed are decoded from columnar seasons
+        return ((lambda season_data: LeagueAverageTable.from_shots(season_data.shot_columns(LEAGUE_AVERAGE_COLUMNS))),
+                ('shots',))
+
+    def league_average(self, season):
+        """
+        :return: LeagueAverageTable with league averages per zone for the given season.
+        """
+        season_data = self.get(season)
+        load, version = self._league_average_source(season)
+        # Derived table has to contain the shots of every merged delta, the file doesn't depend on them
+        deltas = season_data.deltas if version == ('shots',) else None
+        version = tuple(season_data.version) + version
+        cached = self._league_averages.get(season)
+        if cached is not None and cached[0] == version and cached[2] == deltas:
+            return cached[1]
+
+        # Loaded outside of the lock, deriving the table from shots needs the lock to load the season
+        with timed('league'):
+            table = load(season_data)
+        with self._lock:
+            self._league_averages[season] = (version, table, deltas)
+        return table
+
+
+season_store = SeasonStore()
@@ -0,0 +1,118 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Columns which are needed by the index, the opponent is found from HTM, VTM and TEAM_ID
+INDEX_COLUMNS = ['PLAYER_ID', 'TEAM_ID', 'GAME_ID', 'GAME_DATE', 'PERIOD', 'HTM', 'VTM']
+
+
+def add_filter_arguments(parser):
+    """
+    Adds the filter query parameters to a RequestParser, they are turned into filters with parse_filters.
+    """
+    parser.add_argument('gameId', type=str, required=False, location='args')
+    parser.add_argument('dateFrom', type=str, required=False, location='args')
+    parser.add_argument('dateTo', type=str, required=False, location='args')
+    parser.add_argument('lastGames', type=int, required=False, location='args')
+    parser.add_argument('period', type=str, required=False, location='args')
+    parser.add_argument('opponent', type=str, required=False, location='args')
+
+
+def _parse_date(value):
+    # GAME_DATE is stored as YYYYMMDD number
+    return int(datetime.strptime(value, '%Y-%m-%d').strftime('%Y%m%d'))
+
+
+def parse_filters(args):
+    """
+    :return: Dict of filters which were given, with sorted tuples instead of lists so it can be a part of a key.
+    :raises ValueError: If some filter has a wrong format.
+    """
+    filters = {}
+    if args.get('gameId'):
+        filters['games'] = tuple(sorted({int(game_id) for game_id in args['gameId'].split(",") if game_id.strip()}))
+    if args.get('dateFrom'):
+        filters['date_from'] = _parse_date(args['dateFrom'])
+    if args.get('dateTo'):
+        filters['date_to'] = _parse_date(args['dateTo'])
+    if args.get('lastGames') is not None:
+        if args['lastGames'] < 1:
+            raise ValueError("lastGames has to be at least 1")
+        filters['last_games'] = args['lastGames']
+    if args.get('period'):
+        filters['periods'] = tuple(sorted({int(period) for period in args['period'].split(",") if period.strip()}))
+    if args.get('opponent'):
+        filters['opponents'] = tuple(sorted({team.strip().upper() for team in args['opponent'].split(",")
+                                             if team.strip()}))
+    return filters
+
+
+class ShotIndex:
+    """
+    Indexes of a season for filtering shots of one player without scanning the whole season. Shots have to be
+    sorted by PLAYER_ID (like in SeasonData), so every player is a block of rows. Within each block rows are also
+    kept sorted by GAME_DATE and GAME_ID, so date ranges and last games are a binary search, and periods and
+    opponents have one bitmap per value. It is built once per season.
+    """
+
+    def __init__(self, shots):
+        missing = [column for column in INDEX_COLUMNS if column not in shots.columns]
+        if missing:
+            raise ValueError(f"Shots can't be filtered, columns {', '.join(missing)} are missing")
+
+        player_ids = shots.PLAYER_ID.to_numpy()
+        dates = shots.GAME_DATE.to_numpy().astype(np.int64)
+        games = shots.GAME_ID.to_numpy().astype(np.int64)
+        # Rows of each player ordered by date and game, ties keep the original order
+        self.order = np.lexsort((np.arange(len(shots)), games, dates, player_ids))
+        self.dates = dates[self.order]
+        self.games = games[self.order]
+
+        periods = shots.PERIOD.to_numpy()
+        self.periods = {int(period): periods == period for period in np.unique(periods)}
+
+        # Team of the player is the abbreviation it has in every one of its games, the other one is the opponent
+        home, visitor = shots.HTM.astype(str).to_numpy(), shots.VTM.astype(str).to_numpy()
+        teams = pd.DataFrame({'TEAM_ID': np.r_[shots.TEAM_ID.to_numpy(), shots.TEAM_ID.to_numpy()],
+                              'TEAM': np.r_[home, visitor]})
+        team_abbreviations = teams.groupby('TEAM_ID').TEAM.agg(lambda values: values.value_counts().index[0])
+        own = team_abbreviations.reindex(shots.TEAM_ID.to_numpy()).to_numpy().astype(str)
+        opponents = np.where(home == own, visitor, home)
+        self.opponents = {str(team): opponents == team for team in np.unique(opponents)}
+
+    def rows(self, start, end, games=None, date_from=None, date_to=None, last_games=None, periods=None,
+             opponents=None):
+        """
+        :param start: First row of the player.
+        :param end: Row after the last row of the player.
+        :return: Sorted positions of the rows in [start, end) which pass all the filters.
+        """
+        dates, block_games = self.dates[start:end], self.games[start:end]
+        low, high = 0, end - start
+        if date_from is not None:
+            low = max(low, int(np.searchsorted(dates, date_from, side='left')))
+        if date_to is not None:
+            high = min(high, int(np.searchsorted(dates, date_to, side='right')))
+        if last_games is not None and high > low:
+            # Rows are sorted by game, so the last games are the rows from the start of the last_games-th last run
+            run_starts = np.flatnonzero(np.r_[True, block_games[low + 1:high] != block_games[low:high - 1]]) + low
+            if len(run_starts) > last_games:
+                low = int(run_starts[-last_games])
+
+        rows = self.order[start + low:start + max(high, low)]
+        if games is not None:
+            rows = rows[np.isin(self.games[start + low:start + max(high, low)], games)]
+        if periods is not None:
+            mask = np.zeros(len(rows), dtype=bool)
+            for period in periods:
+                if period in self.periods:
+                    mask |= self.periods[period][rows]
+            rows = rows[mask]
+        if opponents is not None:
+            mask = np.zeros(len(rows), dtype=bool)
+            for opponent in opponents:
+                if opponent in self.opponents:
+                    mask |= self.opponents[opponent][rows]
+            rows = rows[mask]
+        return np.sort(rows)
@@ -0,0 +1,70 @@
+import json
+import struct
+
+import numpy as np
+
+from utils.zones import zone_labels
+
+
+# Columns of the binned data which are needed to draw the shotchart on the client, with their binary types
+BIN_FIELDS = [
+    ('BIN_LOC_X', np.float32),
+    ('BIN_LOC_Y', np.float32),
+    ('LOC_COUNTS', np.float32),
+    ('LOC_RAW_COUNTS', np.uint32),
+    ('PCT_LEAGUE_COMPARISON_ZONE', np.float32),
+]
+
+
+def shotchart_data(original_df, binned_df, drop_single_shots=False):
+    """
+    Everything plot_shotchart draws for a player, one row per bin and the zone labels.
+
+    :return: Tuple of DataFrame with BIN_FIELDS columns and list of zone labels.
+    """
+    # Imported here, shotchart_tools imports matplotlib which the server doesn't need until the first chart
+    from utils.shotchart_tools import unique_bins
+
+    dropped_dups = unique_bins(binned_df, drop_single_shots=drop_single_shots)
+    labels = zone_labels(original_df, dropped_dups)
+    bins = dropped_dups.loc[:, [field for field, _ in BIN_FIELDS]].reset_index(drop=True)
+    return bins, [dict(label, zone=list(label['zone'])) for label in labels]
+
+
+def encode_json(bins, labels):
+    """
+    Compact JSON with one array per column, floats are rounded to two decimals which is more than enough for
+    drawing.
+
+    :return: UTF-8 encoded JSON.
+    """
+    columns = {}
+    for field, dtype in BIN_FIELDS:
+        values = bins[field].to_numpy()
+        columns[field] = values.round(2).tolist() if np.issubdtype(dtype, np.floating) else values.tolist()
+    zones = [dict(label, pct=round(label['pct'], 2)) for label in labels]
+    return json.dumps({'bins': columns, 'zones': zones}, separators=(',', ':')).encode('utf-8')
+
+
+def encode_binary(bins, labels):
+    """
+    Packs the bins into little-endian typed arrays which can be read directly with JavaScript typed arrays.
+
+    Layout is a uint32 length of the header, header JSON padded with spaces to a multiple of 4 bytes and then
+    one array per column in the order given in header. Header holds the number of bins, name and type of every
+    column and the zone labels.
+
+    :return: Encoded bytes.
+    """
+    header = {
+        'bins': len(bins),
+        'columns': [{'name': field, 'type': np.dtype(dtype).name} for field, dtype in BIN_FIELDS],
+        'zones': labels,
+    }
+    header = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    header += b' ' * (-len(header) % 4)
+
+    parts = [struct.pack('<I', len(header)), header]
+    for field, dtype in BIN_FIELDS:
+        parts.append(bins[field].to_numpy().astype(np.dtype(dtype).newbyteorder('<')).tobytes())
+    return b''.join(parts)
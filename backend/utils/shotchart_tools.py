@@ -2,16 +2,16 @@ import numpy as np
 import matplotlib.pyplot as plt
 import pandas as pd
 import seaborn as sns
-import time
-import requests
 from PIL import Image
 from io import BytesIO
 
 from matplotlib.backends.backend_agg import FigureCanvasAgg
 
-from utils.constants import text_location_mapping
+from utils.headshots import headshot_provider
+from utils.league_average import ZONE_COLUMNS, as_league_table
+from utils.metrics import timed
+from utils.zones import zone_labels
 
-import random
 from matplotlib.patches import Circle, Rectangle, Arc
 
 
@@ -84,198 +84,132 @@ def draw_court(ax=None, color='black', lw=2, background_color="#EBEBE8", outer_l
 
     return ax
 
-from collections import Counter
-import operator
+
 def create_bins(data_frame, bin_number_x = 30, bin_number_y=300 / (500.0 / 30.0), league_average = None,
-                width = 500, height = 300, norm_x = 250, norm_y = 48):
+                width = 500, height = 300, norm_x = 250, norm_y = 48, group_by = None):
     """
     Method which creates bins the dataset into squared grid. This is used so that plot looks nicer than the raw
     locations plot. Along with binning the data, the percentages per zones and for each bin are calculated here
     and added to the copy of data_frame object so they can be used for plotting later.
 
+    Everything is computed on whole columns at once: every shot gets an integer code of its bin and of its zone,
+    and the counts per bin and per zone are gathered with np.bincount, so there is no loop over the shots.
+
+    :param league_average: DataFrame with league averages or LeagueAverageTable built from it.
+    :param group_by: Optional column (e.g. PLAYER_ID), every group is binned as if create_bins was called on its
+                     shots alone. This way shots of many players are binned in a single pass.
     :return: Returns the copied  data_frame pandas DataFrame object with additional info about the shots.
     """
-    # Binned x and y coordinates
-    x_bins, y_bins = [], []
     # Copying the dataset to add more data
     copied_df = data_frame.copy()
-    # Keys are basically x_bin and y_bin
-    keys = []
-    # Counter of shots and shots made per locations
-    location_counts, location_made = Counter(), Counter()
-    # be found
 
     # Size of elements in bin, they should be the same
     bin_size_x = float(width) / float(bin_number_x)
     bin_size_y = float(height) / float(bin_number_y)
-    # List for locations of shots
-    locations_annotated = []
-    # Counter of shots and shots made per zone
-    zones_counts, zones_made = Counter(), Counter()
 
     # Maximum size of an element in one bin
     max_size = int((int(bin_size_x) - 1) * (int(bin_size_y) - 1))
 
-    # Keys that are in restricted area will be stored here, this will be used for finding maximum number of shots
-    restricted_area_keys = []
-
-    # Dictionary which will determine the color of marker in bin
-    percentage_color_dict = {}
-
-    for i in range(len(data_frame)):
-
-        # Row from data frame
-        row = data_frame.iloc[i]
-
-        x_shot_orig, y_shot_orig = row.LOC_X, row.LOC_Y
-
-        # Normalize
-        x_shot = x_shot_orig + norm_x  # to put minimum to zero
-        y_shot = y_shot_orig + norm_y  # to put minimum to zero
-
-        # bin_index = (x_shot / w) * bin_size
-        curr_x_bin = 0 if x_shot == 0 else int((x_shot / float(width)) * bin_number_x)
-        curr_y_bin = 0 if y_shot == 0 else int((y_shot / float(height)) * bin_number_y)
-
-        # Key for dicts
-        key = (curr_x_bin, curr_y_bin)
-
-        if row.SHOT_ZONE_BASIC == "Restricted Area":
-            restricted_area_keys.append(key)
+    # Normalize so that minimum is zero and find the bin of each shot, truncating towards zero like int() does
+    x_shot = data_frame.LOC_X.to_numpy() + norm_x
+    y_shot = data_frame.LOC_Y.to_numpy() + norm_y
+    x_bins = np.trunc((x_shot / float(width)) * bin_number_x).astype(np.int64)
+    y_bins = np.trunc((y_shot / float(height)) * bin_number_y).astype(np.int64)
 
-        # Counting number of shots made and shots shot
-        keys.append(key)
-        location_counts[key] += 1
-        location_made[key] += row.SHOT_MADE_FLAG
-
-        basic_shot_zone, shot_zone_area = row.SHOT_ZONE_BASIC, row.SHOT_ZONE_AREA
-        zone_dist = row.SHOT_ZONE_RANGE
-
-        area_code = shot_zone_area.split("(")[1].split(")")[0]
-        if "3" in basic_shot_zone:
-            locations_annotated.append("3" + area_code)
-        elif "Paint" in basic_shot_zone:
-            locations_annotated.append("P" + area_code + zone_dist[0])
-        elif "Mid" in basic_shot_zone:
-            locations_annotated.append("M" + area_code + zone_dist[0])
-        else:
-            locations_annotated.append("R" + area_code)
-
-        # Creating key for zones
-        zone_key = (basic_shot_zone, shot_zone_area, zone_dist)
+    # Without grouping all shots belong to the same group
+    if group_by is None:
+        group_codes = np.zeros(len(data_frame), dtype=np.int64)
+    else:
+        group_codes = pd.factorize(data_frame[group_by])[0]
+
+    # Every distinct (group, x_bin, y_bin) key gets its own code, bin_codes holds the code for each shot
+    bin_keys, bin_codes = np.unique(np.column_stack([group_codes, x_bins, y_bins]), axis=0, return_inverse=True)
+    bin_codes = bin_codes.reshape(-1)
+    n_bins = len(bin_keys)
+    bin_groups = bin_keys[:, 0]
+    n_groups = int(bin_groups.max(initial=-1)) + 1
+
+    # Counting number of shots made and shots shot per bin
+    made = data_frame.SHOT_MADE_FLAG.to_numpy()
+    location_counts = np.bincount(bin_codes, minlength=n_bins)
+    location_made = np.bincount(bin_codes, weights=made, minlength=n_bins)
+
+    # Bins with at least one shot in restricted area are not used for finding maximum number of shots
+    restricted_area = np.zeros(n_bins, dtype=bool)
+    restricted_area[bin_codes[data_frame.SHOT_ZONE_BASIC.to_numpy() == "Restricted Area"]] = True
+    max_out_of_restricted = np.zeros(n_groups)
+    np.maximum.at(max_out_of_restricted, bin_groups[~restricted_area], location_counts[~restricted_area])
+    # Groups which have shots only in restricted area are scaled to their largest bin
+    max_of_group = np.zeros(n_groups)
+    np.maximum.at(max_of_group, bin_groups, location_counts)
+    max_out_of_restricted = np.where(max_out_of_restricted > 0, max_out_of_restricted, max_of_group)
+    max_out_of_restricted = max_out_of_restricted[group_codes]
+
+    # Percentage in given bin for each shot
+    shot_percent = (location_made / location_counts)[bin_codes]
 
-        # Counting the occurences based on both bin_key and zone_key, because of that we have dict in dict
-        if key in percentage_color_dict:
-            if zone_key in percentage_color_dict[key]:
-                percentage_color_dict[key][zone_key] = percentage_color_dict[key][zone_key] + 1
-            else:
-                percentage_color_dict[key][zone_key] = 1
-        else:
-            percentage_color_dict[key] = {}
-            percentage_color_dict[key][zone_key] = 1
-
-        zones_counts[zone_key] += 1
-
-        if row.SHOT_MADE_FLAG:
-            zones_made[zone_key] += 1
-
-    shot_locations_percentage = []  # percentage in given bin
-    shot_locations_counts = []
-    raw_counts = []
-    # List which contains comparison for each shot with league average in that zone
-    shot_comparison = []
-    # List which contains comparison of player's shooting in zone vs league average
-    per_zone_comparison = []
-    per_zone_percentage = []
-
-    # Finding the maximal number of shots from data
-    non_ra = []
-    for key in location_counts:
-        if key not in restricted_area_keys:
-            if location_counts[key] not in non_ra:
-                non_ra.append(location_counts[key])
-
-    sorted_non_ra = sorted(non_ra)
-    max_out_of_restricted = float(sorted_non_ra[-1])
-
-    for j in range(len(data_frame)):
-        key = keys[j]
-        x_bin, y_bin = key[0], key[1]
-        shot_percent = float(location_made[key]) / location_counts[key]
-        # shot_percent = np.clip(shot_percent, 0.3, 0.7)
-        shot_locations_percentage.append(shot_percent * 100)
-        if league_average is not None:
-            # Getting info about zone
-            # We are getting that info from
-            per_zone_counter_from_percentage_color_dict = percentage_color_dict[key]
-            zone_key = max(per_zone_counter_from_percentage_color_dict.items(),
-                           key=operator.itemgetter(1))[0]
-
-            shot_zone_basic = zone_key[0]
-            shot_zone_area = zone_key[1]
-            distance = zone_key[2]
-
-            # Calculating the percentage in current zone
-            zone_percent = 0.0 if zone_key not in zones_made else float(zones_made[zone_key]) / \
-                                                                  float(zones_counts[zone_key])
-
-            # Retrieving league average percentage for current zone
-            avg_percentage = league_average.loc[
-                (league_average.SHOT_ZONE_BASIC == shot_zone_basic) &
-                (league_average.SHOT_ZONE_AREA == shot_zone_area) &
-                (league_average.SHOT_ZONE_RANGE == distance)].FG_PCT.iloc[
-                0
-            ]
-            # Comparison of league average and each shot
-            shot_comparison.append(np.clip((shot_percent - avg_percentage) * 100, -10, 10))
-            # Comparison of zone and league average
-            per_zone_comparison.append(np.clip((zone_percent - avg_percentage) * 100, -10, 10))
-            # Percentage of shot in current zone, kinda inaccurate info, good for some other type of plot
-            per_zone_percentage.append(zone_percent * 100)
-
-        # Calculating value to which the markers will be scaled later on
-        # The data in restricted is scaled to maximum out of restricted area, because players usually have a lot
-        # more shots in restricted area
-        value_to_scale = max_out_of_restricted if location_counts[key] > max_out_of_restricted else \
-            location_counts[key]
-        # Storing the data into a list
-        shot_locations_counts.append((float(value_to_scale) / max_out_of_restricted) * max_size)
-
-        # Count of shots per bin
-        raw_counts.append(location_counts[key])
-
-        # Middle of current and next bin is where we will place the marker in real coordinates
-        unbinned_x = ((x_bin * float(width)) / bin_number_x + (
-                (x_bin + 1) * float(width)) / bin_number_x) / 2 - norm_x
-        unbinned_y = ((y_bin * float(height)) / bin_number_y + (
-                (y_bin + 1) * float(height)) / bin_number_y) / 2 - norm_y
-
-        # Adding binned locations
-        x_bins.append(unbinned_x)
-        y_bins.append(unbinned_y)
+    if league_average is not None:
+        # Same as with bins, every zone of every group gets its code
+        zone_codes, zones = pd.MultiIndex.from_arrays(
+            [group_codes] + [data_frame[column] for column in ZONE_COLUMNS]).factorize()
+        n_zones = len(zones)
+        zones_counts = np.bincount(zone_codes, minlength=n_zones)
+        zones_made = np.bincount(zone_codes, weights=made, minlength=n_zones)
+        zone_percent = zones_made / zones_counts
+
+        # Zone with the most shots in each bin, ties go to the zone which appeared first in that bin
+        pairs, first_seen, pair_counts = np.unique(bin_codes * n_zones + zone_codes, return_index=True,
+                                                   return_counts=True)
+        pair_bins, pair_zones = pairs // n_zones, pairs % n_zones
+        order = np.lexsort((first_seen, -pair_counts, pair_bins))
+        _, first_of_bin = np.unique(pair_bins[order], return_index=True)
+        bin_zone = pair_zones[order][first_of_bin][bin_codes]
+
+        # Retrieving league average percentage for zone of each shot
+        avg_percentage = as_league_table(league_average).lookup(zones.droplevel(0))[bin_zone]
+        shot_zone_percent = zone_percent[bin_zone]
+
+    # Calculating value to which the markers will be scaled later on
+    # The data in restricted is scaled to maximum out of restricted area, because players usually have a lot
+    # more shots in restricted area
+    raw_counts = location_counts[bin_codes]
+    value_to_scale = np.minimum(raw_counts, max_out_of_restricted)
+
+    # Middle of current and next bin is where we will place the marker in real coordinates
+    x_bin, y_bin = bin_keys[bin_codes, 1], bin_keys[bin_codes, 2]
+    unbinned_x = ((x_bin * float(width)) / bin_number_x + ((x_bin + 1) * float(width)) / bin_number_x) / 2 - norm_x
+    unbinned_y = ((y_bin * float(height)) / bin_number_y + ((y_bin + 1) * float(height)) / bin_number_y) / 2 - norm_y
 
     # Binned locations
-    copied_df['BIN_LOC_X'] = x_bins
-    copied_df['BIN_LOC_Y'] = y_bins
+    copied_df['BIN_LOC_X'] = unbinned_x
+    copied_df['BIN_LOC_Y'] = unbinned_y
     # Percentage comparison with league averages
     if league_average is not None:
         # Comparison of each shot with league average for that zone
-        copied_df['PCT_LEAGUE_AVG_COMPARISON'] = shot_comparison
+        copied_df['PCT_LEAGUE_AVG_COMPARISON'] = np.clip((shot_percent - avg_percentage) * 100, -10, 10)
         # Comparison of each zone with league average for that zone
-        copied_df['PCT_LEAGUE_COMPARISON_ZONE'] = per_zone_comparison
+        copied_df['PCT_LEAGUE_COMPARISON_ZONE'] = np.clip((shot_zone_percent - avg_percentage) * 100, -10, 10)
         # Percentage of whole zone (not in comparison with league average)
-        copied_df['LOC_ZONE_PERCENTAGE'] = per_zone_percentage
+        copied_df['LOC_ZONE_PERCENTAGE'] = shot_zone_percent * 100
     # Percentage of shots for that location
-    copied_df['LOC_PERCENTAGE'] = shot_locations_percentage
+    copied_df['LOC_PERCENTAGE'] = shot_percent * 100
     # Scaled count of shots and count of shots per bin
-    copied_df['LOC_COUNTS'] = shot_locations_counts
+    copied_df['LOC_COUNTS'] = (value_to_scale / max_out_of_restricted) * max_size
     copied_df['LOC_RAW_COUNTS'] = raw_counts
 
     return copied_df
 
 
+import matplotlib as mpl
 import matplotlib.path as mpath
-from matplotlib.colors import colorConverter
+import threading
+from functools import lru_cache
+from matplotlib.figure import Figure
+
+bball_gray = '#312f30'
+bball_white = '#dddee0'
+bball_orange = '#f87c24'
+bball_light_orange = '#fbaf7b'
 
 
 def get_smooth_square():
@@ -297,29 +231,51 @@ def get_smooth_square():
     return mpath.Path(marker, closed=True)
 
 
-def plot_shotchart(original_df, data_frame, title, mode='light', plot_text=False, drop_single_shots=False,
-                   plot_attempts=False, season=None):
-    plt.style.use('fivethirtyeight')
-    fig, ax = plt.subplots(figsize=(12, 12))
-    # colors_dict = {0:'red', 1:'green'}
-    cmap_list = sns.blend_palette(colors=["#4159E1", "#B0E0E6", "#FFFF99", "#EF3330", "#AB2020"], n_colors=21,
-                                  as_cmap=False)
+def get_bin_marker(shape='square'):
+    """
+    :return: Marker of the bins, smooth square or a pointy top hexagon for the hexagonal bins.
+    """
+    if shape == 'hex':
+        return mpath.Path.unit_regular_polygon(6)
+    return get_smooth_square()
+
 
+@lru_cache(maxsize=None)
+def get_comparison_palette():
+    """
+    Colors for comparison with the league average, index 0 is 10% below and index 20 is 10% above the average.
+    Palette never changes, so it is blended only once.
+    """
+    return sns.blend_palette(colors=["#4159E1", "#B0E0E6", "#FFFF99", "#EF3330", "#AB2020"], n_colors=21,
+                             as_cmap=False)
+
+
+def unique_bins(data_frame, drop_single_shots=False):
+    """
+    Reduces output of create_bins to one row per bin.
+
+    :return: DataFrame with first shot of every bin.
+    """
     # LOC_PERCENTAGE -> total perc
     # PCT_LEAGUE_AVG_COMPARISON -> comparison per bins
     # PCT_LEAGUE_COMPARISON_ZONE -> comparison per zones only
     # LOC_X, LOC_Y -> real locs
     # BIN_LOC_X, BIN_LOC_Y -> binned locations
-    bball_gray = '#312f30'
-    bball_white = '#dddee0'
-    bball_orange = '#f87c24'
-    bball_light_orange = '#fbaf7b'
-
-    marker = get_smooth_square()
-    edge_color = colorConverter.to_rgba('black', alpha=.5)
     dropped_dups = data_frame.drop_duplicates(subset=['BIN_LOC_X', 'BIN_LOC_Y'], keep='first')
     if drop_single_shots:
         dropped_dups = dropped_dups.loc[dropped_dups.LOC_RAW_COUNTS > 1]
+    return dropped_dups
+
+
+def plot_bins(ax, data_frame, marker, drop_single_shots=False):
+    """
+    Plots one marker per bin, sized by number of shots and colored by comparison with the league average.
+
+    :return: Tuple of DataFrame with one row per bin and the created scatter.
+    """
+    cmap_list = get_comparison_palette()
+
+    dropped_dups = unique_bins(data_frame, drop_single_shots=drop_single_shots)
 
     colors = [cmap_list[int(item) + 10] for item in dropped_dups.PCT_LEAGUE_COMPARISON_ZONE.tolist()]
     paths = ax.scatter(
@@ -331,13 +287,10 @@ def plot_shotchart(original_df, data_frame, title, mode='light', plot_text=False
         # cmap=colors,
         edgecolors=bball_white,
     )
+    return dropped_dups, paths
 
-    if mode == 'dark':
-        background_color = "#000000"
-        font_color = "#E8E8FF"
-    else:
-        background_color = "#EBEBE8"
-        font_color = "#454545"
+
+def plot_legend(ax, marker):
     # Frequency
 
     ax.text(x=-240, y=360, s="Less\nFrequent", color=bball_white, fontsize=12)
@@ -359,34 +312,25 @@ def plot_shotchart(original_df, data_frame, title, mode='light', plot_text=False
     ax.scatter(x=198, y=377, s=550, marker=marker, c="#AB2020", edgecolors=bball_white)
     ax.text(x=201, y=360, s="   Above\nAverage", color=bball_white, fontsize=12)
 
-    df_by_zone_sum = original_df.groupby(by=['SHOT_ZONE_BASIC', 'SHOT_ZONE_AREA', 'SHOT_ZONE_RANGE']).sum()
-    df_by_zone_sum.loc[:, 'ZONE_PCT'] = (df_by_zone_sum.SHOT_MADE_FLAG / df_by_zone_sum.SHOT_ATTEMPTED_FLAG) * 100
-    df_by_zone_median = original_df.groupby(by=['SHOT_ZONE_BASIC', 'SHOT_ZONE_AREA', 'SHOT_ZONE_RANGE']).median()
-    for index in range(len(df_by_zone_median)):
-        loc_x = df_by_zone_median.iloc[index].LOC_X
-        loc_y = df_by_zone_median.iloc[index].LOC_Y
-        zone_percentage = df_by_zone_sum.iloc[index].ZONE_PCT
-        zone_shots_made = df_by_zone_sum.iloc[index].SHOT_MADE_FLAG
-        zone_shots_attempted = df_by_zone_sum.iloc[index].SHOT_ATTEMPTED_FLAG
-        if df_by_zone_median.iloc[index].name not in text_location_mapping:
-            continue
-        x, y = text_location_mapping[df_by_zone_median.iloc[index].name]
-        key = df_by_zone_median.iloc[index].name
-        binned_data = dropped_dups.loc[
-            (dropped_dups.SHOT_ZONE_BASIC == key[0]) &
-            (dropped_dups.SHOT_ZONE_AREA == key[1]) &
-            (dropped_dups.SHOT_ZONE_RANGE == key[2])]
-        if len(binned_data) < 3:
-            continue
-        if zone_shots_attempted < 5:
-            continue
+
+def plot_zone_labels(ax, original_df, dropped_dups, plot_attempts=False):
+    """
+    Writes FG% (or makes/attempts) of every zone in which player has enough shots.
+
+    :return: List of created texts.
+    """
+    texts = []
+    for label in zone_labels(original_df, dropped_dups):
         if plot_attempts:
-            ax.text(x=x, y=y, s=f"{int(zone_shots_made)}/{int(zone_shots_attempted)}", ha='center', c='black',
-                    bbox={'facecolor': '#F3F3A9', 'alpha': 0.75, 'edgecolor': 'black'})
+            text = f"{label['made']}/{label['attempted']}"
         else:
-            ax.text(x=x, y=y, s=f"{zone_percentage:.2f}%", ha='center', c='black',
-                    bbox={'facecolor': '#F3F3A9', 'alpha': 0.75, 'edgecolor': 'black'})
+            text = f"{label['pct']:.2f}%"
+        texts.append(ax.text(x=label['x'], y=label['y'], s=text, ha='center', c='black',
+                             bbox={'facecolor': '#F3F3A9', 'alpha': 0.75, 'edgecolor': 'black'}))
+    return texts
+
 
+def style_axes(fig, ax):
     # Removing ticks
     ax.xaxis.set_ticks([])
     ax.yaxis.set_ticks([])
@@ -396,21 +340,166 @@ def plot_shotchart(original_df, data_frame, title, mode='light', plot_text=False
     ax.set_facecolor(bball_gray)
     fig.set_facecolor(bball_gray)
 
-    if season is not None:
-        team_id = original_df.iloc[0].TEAM_ID
-        player_id = original_df.iloc[0].PLAYER_ID
-        url = f"https://ak-static.cms.nba.com/wp-content/uploads/headshots/nba/{team_id}/{season}/260x190/{player_id}.png"
-        response = requests.get(url)
-        img = Image.open(BytesIO(response.content))
 
-        ax.imshow(img, extent=(132, 252, -48, 40), zorder=5)
+def plot_headshot(ax, original_df, season):
+    team_id = original_df.iloc[0].TEAM_ID
+    player_id = original_df.iloc[0].PLAYER_ID
+    with timed('headshot'):
+        img = headshot_provider.get(team_id, season, player_id)
+
+    ax.imshow(img, extent=(132, 252, -48, 40), zorder=5)
+
+
+def plot_shotchart(original_df, data_frame, title, mode='light', plot_text=False, drop_single_shots=False,
+                   plot_attempts=False, season=None, shape='square'):
+    """
+    Plots the whole shotchart on a new figure. Figure isn't registered with pyplot, so it is freed as soon as the
+    caller drops it.
+
+    :return: matplotlib Figure
+    """
+    plt.style.use('fivethirtyeight')
+    fig = Figure(figsize=(12, 12))
+    ax = fig.subplots()
+    # colors_dict = {0:'red', 1:'green'}
+
+    marker = get_smooth_square()
+    dropped_dups, _ = plot_bins(ax, data_frame, get_bin_marker(shape), drop_single_shots=drop_single_shots)
+
+    plot_legend(ax, marker)
+    plot_zone_labels(ax, original_df, dropped_dups, plot_attempts=plot_attempts)
+    style_axes(fig, ax)
+
+    if season is not None:
+        plot_headshot(ax, original_df, season)
 
     # Title
-    plt.title(title, size=24, color=bball_orange)
+    ax.set_title(title, size=24, color=bball_orange)
 
     # Drawing court
     draw_court(ax=ax, outer_lines=True, lw=3, color=bball_light_orange)
     ax.set_xlim(-252, 252)
     ax.set_ylim(-65, 423)
 
-    return fig
\ No newline at end of file
+    return fig
+
+
+class ShotchartBackground:
+    """
+    Everything on the shotchart which doesn't depend on the player: styling, court and the legend. It is built
+    once and the pixels of the parts which are drawn below the shots are saved. Rendering a player then restores
+    those pixels and draws only the remaining artists on top of them, in the same order in which a full draw of
+    plot_shotchart would draw them, so the resulting image is the same.
+    """
+
+    # Order of artists with the same zorder in plot_shotchart: shots, then static artists (legend, court),
+    # then zone labels and at the end the title
+    SHOTS, STATIC, ZONE_LABELS, TITLE = range(4)
+
+    def __init__(self):
+        plt.style.use('fivethirtyeight')
+        self.figure = Figure(figsize=(12, 12))
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.subplots()
+        self.marker = get_smooth_square()
+        self._lock = threading.Lock()
+
+        plot_legend(self.ax, self.marker)
+        style_axes(self.figure, self.ax)
+        self.titles = [self.ax.title, self.ax._left_title, self.ax._right_title]
+        draw_court(ax=self.ax, outer_lines=True, lw=3, color=bball_light_orange)
+        self.ax.set_xlim(-252, 252)
+        self.ax.set_ylim(-65, 423)
+
+        # Same artists which Axes.draw would draw, frame is turned off so there are no spines
+        artists = [artist for artist in self.ax.get_children()
+                   if artist is not self.ax.patch and artist not in self.ax.spines.values()]
+        artists = sorted(artists, key=lambda artist: artist.zorder)
+        # Nothing player specific goes below zorder 1, so everything there is a part of the background
+        self.foreground = [artist for artist in artists if artist.zorder >= 1]
+
+        for artist in self.foreground:
+            artist.set_visible(False)
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        for artist in self.foreground:
+            artist.set_visible(True)
+
+    def render_png(self, original_df, data_frame, title, mode='light', plot_text=False, drop_single_shots=False,
+                   plot_attempts=False, shape='square'):
+        """
+        Renders shotchart of a player on top of the background.
+
+        :return: Bytes of the PNG image.
+        """
+        with self._lock:
+            with timed('plot'):
+                marker = self.marker if shape == 'square' else get_bin_marker(shape)
+                dropped_dups, paths = plot_bins(self.ax, data_frame, marker, drop_single_shots=drop_single_shots)
+                texts = plot_zone_labels(self.ax, original_df, dropped_dups, plot_attempts=plot_attempts)
+                self.ax.set_title(title, size=24, color=bball_orange)
+            try:
+                to_draw = [(paths.zorder, self.SHOTS, paths)]
+                to_draw += [(text.zorder, self.ZONE_LABELS, text) for text in texts]
+                to_draw += [(artist.zorder, self.TITLE if artist in self.titles else self.STATIC, artist)
+                            for artist in self.foreground]
+                # Stable sort keeps the order of artists in the same group
+                to_draw = sorted(to_draw, key=lambda item: (item[0], item[1]))
+
+                with timed('png'):
+                    self.canvas.restore_region(self.background)
+                    renderer = self.canvas.get_renderer()
+                    for _, _, artist in to_draw:
+                        artist.draw(renderer)
+
+                    output = BytesIO()
+                    mpl.image.imsave(output, self.canvas.buffer_rgba(), format="png", origin="upper",
+                                     dpi=self.figure.dpi)
+                return output.getvalue()
+            finally:
+                paths.remove()
+                for text in texts:
+                    text.remove()
+
+
+@lru_cache(maxsize=None)
+def get_shotchart_background():
+    return ShotchartBackground()
+
+
+def render_shotchart_png(original_df, data_frame, title, season=None, **kwargs):
+    """
+    Renders shotchart into PNG. Charts without a headshot are drawn on top of the prepared background, headshot
+    changes the aspect of the axes so those are drawn from scratch.
+
+    :return: Bytes of the PNG image.
+    """
+    if season is None:
+        return get_shotchart_background().render_png(original_df, data_frame, title, **kwargs)
+
+    with timed('plot'):
+        figure = plot_shotchart(original_df, data_frame, title, season=season, **kwargs)
+    try:
+        with timed('png'):
+            output = BytesIO()
+            FigureCanvasAgg(figure).print_png(output)
+        return output.getvalue()
+    finally:
+        figure.clear()
+
+
+def compose_grid(pngs, tile_size=400, background=bball_gray):
+    """
+    Puts shotcharts next to each other into a single image with as many columns as rows (small multiples).
+
+    :return: Bytes of the PNG image.
+    """
+    columns = max(int(np.ceil(np.sqrt(len(pngs)))), 1)
+    rows = max(int(np.ceil(len(pngs) / columns)), 1)
+    grid = Image.new('RGB', (columns * tile_size, rows * tile_size), background)
+    for index, png in enumerate(pngs):
+        tile = Image.open(BytesIO(png)).convert('RGB').resize((tile_size, tile_size), Image.LANCZOS)
+        grid.paste(tile, ((index % columns) * tile_size, (index // columns) * tile_size))
+    output = BytesIO()
+    grid.save(output, format='PNG')
+    return output.getvalue()
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from utils.constants import ZONE_CATEGORIES, text_location_codes
+
+# Number of values of every zone column, a zone is identified by its codes in all three
+ZONE_SHAPE = tuple(len(categories) for categories in ZONE_CATEGORIES.values())
+
+
+def zone_codes(data_frame):
+    """
+    :return: numpy array with a single code of the zone of every row, -1 for zones with a value which isn't in
+             ZONE_CATEGORIES. Codes are ordered the same as the zones by their names.
+    """
+    codes = np.zeros(len(data_frame), dtype=np.int64)
+    known = np.ones(len(data_frame), dtype=bool)
+    for column, categories in ZONE_CATEGORIES.items():
+        # Compacted columns already have these categories, then this doesn't touch the strings
+        column_codes = pd.Categorical(data_frame[column], categories=categories).codes
+        known &= column_codes >= 0
+        codes = codes * len(categories) + column_codes
+    return np.where(known, codes, -1)
+
+
+def zone_summary(original_df, dropped_dups):
+    """
+    Makes, attempts, FG% and number of bins of every zone in which the player has shots, counted in one pass over
+    the shots and one over the bins, together with the position of the zone label from text_location_codes.
+
+    :param original_df: Shots of the player.
+    :param dropped_dups: Bins of the player, the output of unique_bins.
+    :return: DataFrame with the zone columns, made, attempted, pct, bins and label ((x, y) or None), one row per
+             zone ordered by zone.
+    """
+    n_zones = int(np.prod(ZONE_SHAPE))
+    shot_zones = zone_codes(original_df)
+    known = shot_zones >= 0
+    shot_zones = shot_zones[known]
+    shots = np.bincount(shot_zones, minlength=n_zones)
+    attempted = np.bincount(shot_zones, weights=original_df.SHOT_ATTEMPTED_FLAG.to_numpy()[known],
+                            minlength=n_zones)
+    made = np.bincount(shot_zones, weights=original_df.SHOT_MADE_FLAG.to_numpy()[known], minlength=n_zones)
+    bin_zones = zone_codes(dropped_dups)
+    bins = np.bincount(bin_zones[bin_zones >= 0], minlength=n_zones)
+
+    zones = np.flatnonzero(shots)
+    parts = np.unravel_index(zones, ZONE_SHAPE)
+    summary = pd.DataFrame({column: np.asarray(categories, dtype=object)[codes]
+                            for (column, categories), codes in zip(ZONE_CATEGORIES.items(), parts)})
+    summary['made'] = made[zones].astype(np.int64)
+    summary['attempted'] = attempted[zones].astype(np.int64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        summary['pct'] = (made[zones] / attempted[zones]) * 100
+    summary['bins'] = bins[zones]
+    summary['label'] = [text_location_codes.get(zone) for zone in zip(*(codes.tolist() for codes in parts))]
+    return summary
+
+
+def zone_labels(original_df, dropped_dups):
+    """
+    Finds zones which get a label on the shotchart, those are zones from text_location_mapping in which player
+    has at least 5 shots spread over at least 3 bins.
+
+    :return: List of dicts with zone, position of the label, shots made, shots attempted and FG% of the zone.
+    """
+    summary = zone_summary(original_df, dropped_dups)
+    labeled = summary.loc[summary.label.notna() & (summary.bins >= 3) & (summary.attempted >= 5)]
+    return [{'zone': (basic, area, zone_range), 'x': label[0], 'y': label[1], 'made': int(made),
+             'attempted': int(attempted), 'pct': float(pct)}
+            for basic, area, zone_range, made, attempted, pct, label in labeled.loc[
+                :, list(ZONE_CATEGORIES) + ['made', 'attempted', 'pct', 'label']].itertuples(index=False, name=None)]